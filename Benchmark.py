@@ -0,0 +1,190 @@
+# Benchmark.py measures how close each whistle lands to its target minute.
+# It drives the bot through the scheduled, WTWB and GAMEDAY paths on a
+# simulated clock against the stand-in servers, records when each whistle's
+# tweet was posted relative to its target (or that it was abandoned), and
+# reports lateness percentiles. On the simulated clock waits are instant, so
+# that lateness is outbox holds and retries plus processing time; how far the
+# main loop wakes from its deadlines is measured separately on the real clock.
+# Costs of the work on the critical path are reported too, so regressions
+# show up in numbers.
+
+# Run with: python3 Benchmark.py [start YYYY-MM-DD] [end YYYY-MM-DD] [session file]
+
+from collections import deque
+from datetime import datetime, timedelta
+from sys import argv
+from time import perf_counter
+
+from Constants import *
+from Clock import Clock
+from GTWhistler import Whistler
+from Scheduler import EventScheduler
+from TweetOutbox import TweetOutbox
+import Simulation
+
+# Which path each scheduler event belongs to
+benchmarkPaths = {
+    Event_scheduledWhistle: "scheduled",
+    Event_wtwbCeremony:     "WTWB",
+    Event_wtwbInMemoriam:   "WTWB",
+    Event_gameday:          "GAMEDAY"
+}
+benchmarkPercentiles = [50, 95, 99]
+benchmarkWakes       = 6   # Real-clock wakes measured
+benchmarkWakeSpacing = 1.5 # seconds apart, beyond "sleepFinalWindow" so chunked sleeps are covered
+
+class BenchmarkWhistler(Whistler):
+    """Class that records timing of every whistle and
+    of the work done on the way to it"""
+
+    # Lists of lateness (seconds) by path, and of costs (seconds) by method
+    lateness  = None
+    costs     = None
+    abandoned = None # Path -> number of whistles given up on
+    paths     = None # Whistle text -> paths of its unposted whistles, oldest first
+
+    def __init__(self, *args, **kwargs):
+        self.lateness = {}
+        self.costs = {}
+        self.abandoned = {}
+        self.paths = {}
+        Whistler.__init__(self, *args, **kwargs)
+        self.tweetOutbox = BenchmarkOutbox(self)
+
+    def recordCost(self, name, start):
+        self.costs.setdefault(name, []).append(perf_counter() - start)
+
+    # Path is known when whistling, but lateness only once outbox posts it
+    def whistle(self, text):
+        path = benchmarkPaths.get(self.scheduler.currentEvent, self.scheduler.currentEvent)
+        self.paths.setdefault(text, deque()).append(path)
+        Whistler.whistle(self, text)
+
+    def takePath(self, entry):
+        paths = self.paths.get(entry[Outbox_text])
+        if paths is None:
+            return None
+        path = paths.popleft()
+        if len(paths) == 0:
+            del self.paths[entry[Outbox_text]]
+        return path
+
+    # Lateness is simulated time from target to post (which counts any
+    # holds and retries on the way) plus real time spent in the posting event
+    def recordPosted(self, entry):
+        path = self.takePath(entry)
+        late = self.clock.now().timestamp() - entry[Outbox_targetTime]
+        if self.scheduler.currentEvent is not None:
+            late += perf_counter() - self.scheduler.currentStart
+        self.lateness.setdefault(path, []).append(late)
+
+    def recordAbandoned(self, entry):
+        path = self.takePath(entry)
+        self.abandoned[path] = self.abandoned.get(path, 0) + 1
+
+    def setPrevTweets(self):
+        start = perf_counter()
+        Whistler.setPrevTweets(self)
+        self.recordCost("setPrevTweets", start)
+
+    def createValidRandomWhistleText(self, prefixString=""):
+        start = perf_counter()
+        text = Whistler.createValidRandomWhistleText(self, prefixString)
+        self.recordCost("createValidRandomWhistleText", start)
+        return text
+
+class BenchmarkOutbox(TweetOutbox):
+    """Class that reports each whistle's outcome to the benchmark"""
+
+    whistler = None
+
+    def __init__(self, whistler):
+        self.whistler = whistler
+
+    def markPosted(self, entry):
+        TweetOutbox.markPosted(entry)
+        self.whistler.recordPosted(entry)
+
+    def markAbandoned(self, entry):
+        TweetOutbox.markAbandoned(entry)
+        self.whistler.recordAbandoned(entry)
+
+class BenchmarkScheduler(EventScheduler):
+    """Class that keeps every wake drift, not just the latest and largest"""
+
+    drifts = None
+
+    def __init__(self, clock=None):
+        self.drifts = []
+        EventScheduler.__init__(self, clock)
+
+    def recordWakeDrift(self, drift):
+        self.drifts.append(drift)
+        EventScheduler.recordWakeDrift(self, drift)
+
+# Returns drift (seconds) of each wake for evenly spaced events on the real clock
+def measureWakeDrift():
+    scheduler = BenchmarkScheduler(Clock())
+    start = scheduler.clock.now()
+    for index in range(benchmarkWakes):
+        last = index == benchmarkWakes - 1
+        scheduler.schedule("wake" + str(index),
+                           start + timedelta(seconds=benchmarkWakeSpacing * (index + 1)),
+                           scheduler.stop if last else (lambda: None))
+    scheduler.run()
+    return scheduler.drifts
+
+# Nearest-rank percentile of an unsorted list
+def percentile(values, percent):
+    ordered = sorted(values)
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+def formatRow(name, values, scale, unit):
+    cells = ["p{0} {1:>9.1f} {2}".format(percent, percentile(values, percent) * scale, unit)
+             for percent in benchmarkPercentiles]
+    cells.append("max {0:>9.1f} {1}".format(max(values) * scale, unit))
+    return "  {0:<30} n={1:<6} ".format(name, len(values)) + "  ".join(cells)
+
+def printReport(whistler, realElapsed, wakeDrifts):
+    print("Whistle lateness (from target minute, simulated clock):")
+    for path, values in sorted(whistler.lateness.items()):
+        print(formatRow(path, values, 1000, "ms"))
+    allValues = [value for values in whistler.lateness.values() for value in values]
+    if len(allValues) > 0:
+        print(formatRow("all", allValues, 1000, "ms"))
+
+    print("Whistles abandoned:")
+    for path, count in sorted(whistler.abandoned.items()):
+        print("  {0:<30} {1}".format(path, count))
+    if len(whistler.abandoned) == 0:
+        print("  none")
+
+    print("Wake drift (from deadline, real clock):")
+    if len(wakeDrifts) > 0:
+        print(formatRow("run", wakeDrifts, 1000, "ms"))
+
+    print("Costs of whistle work:")
+    for name, values in sorted(whistler.costs.items()):
+        print(formatRow(name, values, 1000, "ms"))
+
+    print("Ran in {0:.1f} s".format(realElapsed))
+
+def runBenchmark(start, end, sessionFile=Simulation.simSessionFile):
+    whistler, session, realElapsed = Simulation.runSimulation(start, end, sessionFile,
+                                                              whistlerClass=BenchmarkWhistler)
+    return whistler, realElapsed
+
+# -----------------
+# --- EXECUTION ---
+# -----------------
+
+if __name__ == "__main__":
+    # Default range covers a GAMEDAY and WTWB along with regular weeks
+    start = tz.localize(datetime.strptime(argv[1] if len(argv) > 1 else "2016-08-22", "%Y-%m-%d"))
+    end   = tz.localize(datetime.strptime(argv[2] if len(argv) > 2 else "2017-05-10", "%Y-%m-%d"))
+    sessionFile = argv[3] if len(argv) > 3 else Simulation.simSessionFile
+
+    whistler, realElapsed = runBenchmark(start, end, sessionFile)
+    wakeDrifts = measureWakeDrift()
+    printReport(whistler, realElapsed, wakeDrifts)
@@ -0,0 +1,92 @@
+# CircuitBreaker.py holds the circuit breaker kept for each outside service
+# the bot depends on. When one keeps failing, calls to it pause for a
+# growing backoff while everything else carries on as normal.
+
+import threading
+from enum import Enum
+
+from Constants import *
+
+class BreakerState(Enum):
+    closed   = 0 # Calls go through
+    open     = 1 # Calls skipped until backoff ends
+    halfOpen = 2 # One probe call allowed to see if service is back
+
+class CircuitBreaker:
+    """Class that stops calling a failing dependency for an
+    exponentially growing backoff, then probes it once before resuming"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    name             = None
+    clock            = None
+    lock             = None
+    state            = BreakerState.closed
+    failures         = 0 # In a row
+    failureThreshold = breakerFailureThreshold
+    baseDelay        = breakerBaseDelay # seconds
+    maxDelay         = breakerMaxDelay  # seconds
+    delay            = 0
+    openUntil        = 0.0
+    probing          = False
+
+    def __init__(self, name, clock,
+                 failureThreshold=breakerFailureThreshold,
+                 baseDelay=breakerBaseDelay,
+                 maxDelay=breakerMaxDelay):
+        self.name = name
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.failureThreshold = failureThreshold
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+
+    def useClock(self, newClock):
+        self.clock = newClock
+
+    # Whether a call should be made now
+    def allow(self):
+        with self.lock:
+            if self.state is BreakerState.closed:
+                return True
+            if self.state is BreakerState.open:
+                if self.clock.timestamp() < self.openUntil:
+                    return False
+                self.state = BreakerState.halfOpen
+                self.probing = False
+            # Half open: only one call at a time finds out if service is back
+            if self.probing:
+                return False
+            self.probing = True
+            logging.info("Probing " + self.name + " after backoff")
+            return True
+
+    def recordSuccess(self):
+        with self.lock:
+            if self.state is not BreakerState.closed:
+                logging.info("Circuit for " + self.name + " closed again")
+            self.state = BreakerState.closed
+            self.failures = 0
+            self.delay = 0
+            self.probing = False
+
+    def recordFailure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state is BreakerState.halfOpen or self.failures >= self.failureThreshold:
+                # Double backoff each time it opens without recovering in between
+                self.delay = min(self.maxDelay, self.delay * 2 if self.delay > 0 else self.baseDelay)
+                self.openUntil = self.clock.timestamp() + self.delay
+                self.state = BreakerState.open
+                logging.warning("Circuit for " + self.name + " open for " +
+                                str(int(self.delay)) + " s after " + str(self.failures) + " failure(s)")
+
+    # Seconds until calls are tried again (0 if they can be now)
+    def getRemainingDelay(self):
+        with self.lock:
+            if self.state is not BreakerState.open:
+                return 0.0
+            return max(0.0, self.openUntil - self.clock.timestamp())
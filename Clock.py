@@ -0,0 +1,78 @@
+# Clock.py holds the source of time for the bot. Everything asks its clock
+# for the time and to wait, so a simulated clock can jump straight to the
+# next deadline and run weeks of schedule in seconds.
+
+from datetime import datetime, timedelta
+from time import monotonic, sleep, time
+
+from Constants import *
+
+class Clock:
+    """Class that tells real time and waits in real time"""
+
+    simulated = False
+
+    def now(self):
+        return datetime.now(tz)
+
+    def timestamp(self):
+        return time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            sleep(seconds)
+
+    # Deadline is converted to an absolute UTC instant, so DST changes can't
+    # shift it. Sleeps on the monotonic clock in shrinking chunks, rechecking
+    # wall time between them so a clock jump can't cause an oversleep, then
+    # sleeps the final stretch in one go. Returns how many seconds past the
+    # deadline it woke.
+    def sleepUntil(self, deadline):
+        target = deadline.timestamp()
+
+        while True:
+            wallBefore = time()
+            remaining = target - wallBefore
+            if remaining <= 0:
+                break
+
+            if remaining > sleepFinalWindow:
+                chunk = min(remaining / 2, sleepMaxChunk)
+            else:
+                chunk = remaining
+
+            monotonicBefore = monotonic()
+            sleep(chunk)
+
+            # Wall clock moved differently than time actually slept
+            jump = (time() - wallBefore) - (monotonic() - monotonicBefore)
+            if abs(jump) > clockJumpTolerance:
+                logging.warning("Wall clock jumped {0:+.1f} s while sleeping".format(jump))
+
+        return time() - target
+
+class SimulatedClock(Clock):
+    """Class that tells simulated time, where waiting
+    advances time instantly instead of blocking"""
+
+    simulated = True
+    current   = None
+
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def timestamp(self):
+        return self.current.timestamp()
+
+    # Normalize through timezone so simulated time crosses DST correctly
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.current = (self.current + timedelta(seconds=seconds)).astimezone(tz)
+
+    def sleepUntil(self, deadline):
+        if deadline > self.current:
+            self.current = deadline.astimezone(tz)
+        return 0.0
@@ -0,0 +1,95 @@
+# ConfigWatcher.py notices when the config and schedule files are edited,
+# so the bot can reload just what changed instead of rebuilding everything.
+# It uses inotify (through the optional "inotify_simple" package) where
+# available, and otherwise compares each file's mtime and size. Either way,
+# a file only counts as changed when its contents hash differently.
+
+import hashlib
+import os
+
+from Constants import *
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+class FileWatcher:
+    """Class that reports which watched files have new contents
+    since they were last remembered as loaded"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    fileNames = None # Absolute paths
+    stats     = None # Path -> (mtime, size) when last remembered
+    hashes    = None # Path -> contents hash when last remembered
+    inotify   = None # None when falling back to polling
+    directories = None # inotify watch descriptor -> directory
+    touched   = None # Paths inotify reported since last check
+
+    def __init__(self, fileNames):
+        self.fileNames = [os.path.abspath(fileName) for fileName in fileNames]
+        self.stats = {}
+        self.hashes = {}
+        self.touched = set()
+
+        if inotify_simple is not None:
+            try:
+                self.inotify = inotify_simple.INotify()
+                # Watch directories, since editors often save by replacing the file
+                flags = inotify_simple.flags.CLOSE_WRITE | inotify_simple.flags.MOVED_TO | \
+                        inotify_simple.flags.CREATE | inotify_simple.flags.DELETE
+                self.directories = {}
+                for directory in set(os.path.dirname(fileName) for fileName in self.fileNames):
+                    self.directories[self.inotify.add_watch(directory, flags)] = directory
+            except OSError as e:
+                logging.warning("Falling back to polling config files: " + str(e))
+                self.inotify = None
+
+    @staticmethod
+    def getStat(fileName):
+        try:
+            stat = os.stat(fileName)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def getHash(fileName):
+        try:
+            with open(fileName, 'rb') as inFile:
+                return hashlib.sha1(inFile.read()).hexdigest()
+        except OSError:
+            return None
+
+    # Called once a file's contents are handled (loaded, or rejected as invalid),
+    # so it's only reported again after another edit
+    def remember(self, fileName):
+        fileName = os.path.abspath(fileName)
+        self.stats[fileName] = self.getStat(fileName)
+        self.hashes[fileName] = self.getHash(fileName)
+        self.touched.discard(fileName)
+
+    # Files that might have changed, before checking contents
+    def getCandidates(self):
+        if self.inotify is not None:
+            for event in self.inotify.read(timeout=0):
+                fileName = os.path.join(self.directories[event.wd], event.name)
+                if fileName in self.fileNames:
+                    self.touched.add(fileName)
+            return [fileName for fileName in self.fileNames if fileName in self.touched]
+        return [fileName for fileName in self.fileNames
+                if self.getStat(fileName) != self.stats.get(fileName)]
+
+    # Files whose contents differ from when last remembered
+    # (A touched file with same contents is quietly remembered again.)
+    def getChanged(self):
+        changed = []
+        for fileName in self.getCandidates():
+            if self.getHash(fileName) != self.hashes.get(fileName):
+                changed.append(fileName)
+            else:
+                self.remember(fileName)
+        return changed
@@ -13,19 +13,40 @@ debugDoNotTweet      = False # While in development, this Boolean prevents the
                              # machine to confirm proper output.
 debugDoNotDM         = False # Similar for direct messaging
 
+standInServer        = None  # "host:port" of StandIn.py servers to use in place
+                             # of Twitter and FantasyData, for load testing.
+
+footballEnabled      = False # Football feature, off while the API keeps failing
+
 # Custom file for authentication data not to be shared publicly
 APIConfigFile        = "config.json"
 # Custom file for holding all of the scheduled times the whistle should sound
 scheduleConfigFile   = "schedule.json"
 # Custom file for holding football schedule as access from API
 scheduleFootballFile = "football.json"
-# File for holding data between instances of the program running
+# Database for holding state between instances of the program running
+stateFile            = "state.db"
+# Older JSON file that held state, migrated into database on first run
 storageFile          = "storage.json"
+storageMigratedSuffix = ".migrated"
+# Directory for holding cached football API responses
+footballCacheDir     = "footballCache"
 # File for holding logs of program behavior and actions
 logFile              = "GTW_log.txt"
 
 # Logging constants
 logLevel             = logging.INFO
+logReadBlockSize     = 8192 # bytes read at a time when reading end of log
+logStructured        = False # Write JSON lines rather than plain text
+logMaxSegmentBytes   = 5*1024*1024
+logRotateDaily       = True
+logMaxSegments       = 30 # Including active segment
+logIndexInterval     = 60 # seconds between sidecar index entries
+logIndexSuffix       = ".index"
+logArchiveTimeFormat = "%Y%m%d-%H%M%S"
+LogField_time        = "time"
+LogField_level       = "level"
+LogField_message     = "message"
 
 # Timezone/Formatting constants
 tz                   = timezone('US/Eastern')
@@ -35,6 +56,8 @@ dtFormatFootballAPI  = "%Y-%m-%dT%H:%M:%S"
 
 # Time constants
 secPerMin            = 60
+secPerDay            = 86400
+msPerSec             = 1000
 minPerHour           = 60
 maxHour              = 24
 lastHour             = 23
@@ -45,6 +68,9 @@ minMinute            =  0
 maxSecond            = 60
 lastSecond           = 59
 minSecond            =  0
+dayPerWeek           =  7
+minPerDay            = minPerHour * maxHour
+minPerWeek           = minPerDay * dayPerWeek
 
 # Whistle string constants
 defaultWhistleText   = "shhvreeeEEEEEEEEEEOOOOOooow"
@@ -88,19 +114,55 @@ LowOsDelta           =  2
 
 # Delay constants
 startupDelay         = 10 # seconds
-errorDelay           = 15 # minutes
+errorDelay           = 15 # minutes, before exiting after setup fails
+breakerFailureStatuses  = [401, 403, 429] # Besides 5xx
+breakerFailureThreshold = 2 # failures in a row before pausing calls to a dependency
+breakerBaseDelay     = 60 # seconds, doubled each time pause ends in another failure
+breakerMaxDelay      = errorDelay * 60 # seconds
+outboxLatenessWindow = 5  # minutes after target a whistle may still be posted
+outboxBaseDelay      = 5  # seconds before first retry, doubled each retry
+outboxMaxDelay       = 60 # seconds
+outboxKeepFinished   = 100 # posted/abandoned entries kept for reference
 minTweetTimeDelta    = 1  # minutes
+dailyCheckRetryDelay = 1  # minutes (while a GAMEDAY runs past midnight)
+tweetReconcilePeriod = 6  # hours between checking local tweet history against timeline
+
+# Deadline sleeping constants
+sleepMaxChunk        = 300  # seconds, longest single sleep before rechecking the clock
+sleepFinalWindow     = 1.0  # seconds, within which the rest is slept in one go
+wakeTolerance        = 0.05 # seconds, wakes further off than this are logged as warnings
+clockJumpTolerance   = 1.0  # seconds, wall/monotonic disagreement logged as a clock jump
 
 # This number is very important/delicate!
 # Setting this rate lower will likely cause this program to
-# exceed its maximum allotted number of API calls per month
+# exceed its maximum allotted number of API calls per month.
+# It is now the baseline; the actual rate adapts to the remaining
+# monthly quota (see Football.getScoreSamplingPeriod).
 scoreSamplingPeriod  = 5 # minutes
+minScoreSamplingPeriod = 1  # minutes
+maxScoreSamplingPeriod = 15 # minutes
+expectedGameHours    = 3.5 # hours, used to spread quota over a game
+minGameMinutesLeft   = 30  # minutes, assumed left when game runs long
+
+# Monthly cap on football API calls, if not set in schedule file
+APImonthlyQuota      = 1000
+APIquotaReserve      = 10 # Calls held back for schedule updates
+
+# Multipliers on sampling period by game situation (lower is faster)
+samplingWeightFourthQuarter = 0.5
+samplingWeightClose         = 0.75
+samplingWeightHalftime      = 3.0
+samplingWeightBlowout       = 2.0
+closeGameMargin      =  8 # points (one score)
+blowoutMargin        = 21 # points (three scores)
 
 # Escape hatch value for if offline and will never receive data
 # indicating the game is over
 gamedayMaxHours      = 6 # hours
 
 # Other Whistler constants
+maxTextAttempts      = 10    # Draws of whistle text before giving up on finding an unused one
+footballTextCacheSize = 256  # Football whistle texts kept, by score and opponent
 numTweetsCompare     = 12    # Number of past tweets to compare against when
                              # generating new tweet text
 twitterCharLimit     = 140   # Twitter 101 - all tweets must be <= 140 characters
@@ -121,6 +183,9 @@ config_consumerSecret    = "consumer_secret"
 config_accessToken       = "access_token"
 config_accessTokenSecret = "access_token_secret"
 config_fantasyDataKey    = "fantasy_data_key"
+configTwitterKeys        = (config_consumerKey, config_consumerSecret,
+                            config_accessToken, config_accessTokenSecret)
+configRequiredKeys       = (config_ownerUserID, config_botUserID, config_fantasyDataKey) + configTwitterKeys
 
 # Schedule JSON field constants
 config_regularSchedule   = "regularSchedule"
@@ -131,6 +196,7 @@ config_football          = "football"
 config_updateMonths      = "updateMonths"
 config_updateWeekday     = "updateWeekday"
 config_pregameHours      = "pregameHours"
+config_monthlyQuota      = "monthlyQuota"
 
 # Generic JSON field constants
 config_year              = "year"
@@ -155,9 +221,21 @@ APIserver     = "api.fantasydata.net"
 APIscorespath = "/v3/cfb/scores/JSON/"
 APIstatspath  = "/v3/cfb/stats/JSON/"
 
+APIpoolSize   = 2  # Idle keep-alive connections held open
+APItimeout    = 30 # seconds
+APIchunkSize  = 16384 # bytes read at a time when streaming a response
+APIdrainLimit = 65536 # bytes left unparsed that are still read to keep connection
+
 APIboxscore        = "BoxScore/"
 APIschedule        = "Games/"
 
+# How long a cached response is used before asking the API again (seconds)
+# Box scores must stay shorter than the fastest score sampling period
+APIcacheTTLs = {
+    APIboxscore: 45,
+    APIschedule: 12 * minPerHour * secPerMin
+}
+
 APIfield_Game          = "Game"
 APIfield_GameID        = "GameID"
 APIfield_DateTime      = "DateTime"
@@ -169,6 +247,13 @@ APIfield_AwayTeamScore = "AwayTeamScore"
 APIfield_HomeTeamScore = "HomeTeamScore"
 APIfield_Period        = "Period"
 APIdata_Final          = "F"
+APIdata_Halftime       = "Half"
+APIdata_FourthQuarter  = "4"
+APIdata_Overtime       = "OT"
+
+# Game fields kept from each box score
+APIgameStateFields = [APIfield_HomeTeam, APIfield_AwayTeam,
+                      APIfield_HomeTeamScore, APIfield_AwayTeamScore, APIfield_Period]
 
 APIdata_GTTeam         = "GTECH"
 #APIdata_GTTeamName     = "Georgia Tech Yellow Jackets"
@@ -192,8 +277,62 @@ gameday_toeHitLeather  = "(Sting 'em!) " + defaultWhistleText
 # Used with score-calibrated whistle, so extra space needed
 gameday_victory        = "(Victory!) "
 
+# Scheduler event names
+Event_dailyCheck       = "dailyCheck"
+Event_processDMs       = "processDMs"
+Event_scheduledWhistle = "scheduledWhistle"
+Event_wtwbCeremony     = "wtwbCeremony"
+Event_wtwbInMemoriam   = "wtwbInMemoriam"
+Event_gameday          = "gameday"
+Event_reconcileTweets  = "reconcileTweets"
+Event_tweetOutbox      = "tweetOutbox"
+Event_configWatch      = "configWatch"
+Event_dmDrain          = "dmDrain"
+
+# Circuit breaker names, one per dependency
+Breaker_twitterPost    = "Twitter post"
+Breaker_twitterRead    = "Twitter read"
+Breaker_DMs            = "Twitter DMs"
+Breaker_football       = "FantasyData"
+
 # Storage File constants
 Storage_LatestDMTimestamp  = "LatestDMTimestamp"
+Storage_FootballAPIMonth   = "FootballAPIMonth"
+Storage_FootballAPICalls   = "FootballAPICalls"
+Storage_TweetHistory       = "TweetHistory"
+
+Storage_WhistleTextState   = "WhistleTextState"
+Storage_WhistleTextOrder   = "WhistleTextOrder"
+
+# Tweet outbox fields and states
+Outbox_seq                 = "seq"
+Outbox_text                = "text"
+Outbox_targetTime          = "targetTime"
+Outbox_attempts            = "attempts"
+Outbox_nextAttempt         = "nextAttempt"
+Outbox_pending             = "pending"
+Outbox_posted              = "posted"
+Outbox_abandoned           = "abandoned"
+
+# Gameday checkpoint fields
+Checkpoint_phase           = "phase"
+Checkpoint_gameInfo        = "gameInfo"
+Checkpoint_gameState       = "gameState"
+Checkpoint_lastPoll        = "lastPoll"
+Checkpoint_savedAt         = "savedAt"
+
+# Whistle text sampling state fields
+TextState_size             = "size"
+TextState_cursor           = "cursor"
+
+# Tweet history entry fields (besides Twitter API fields)
+History_timestamp          = "timestamp"
+
+# Football API cache entry fields
+Cache_storedAt      = "storedAt"
+Cache_ETag          = "etag"
+Cache_lastModified  = "lastModified"
+Cache_data          = "data"
 
 # Twitter API constants
 APIpostTweetPath = "statuses/update"
@@ -201,16 +340,35 @@ APIgetTweetsPath = "statuses/user_timeline"
 APIgetDMsPath = "direct_messages/events/list"
 APIpostDMPath = "direct_messages/events/new"
 
+# Twitter rate limit headers (lowercase, as compared)
+RateLimit_limit     = "x-rate-limit-limit"
+RateLimit_remaining = "x-rate-limit-remaining"
+RateLimit_reset     = "x-rate-limit-reset" # epoch seconds window resets at
+rateLimitReserve    = 2 # calls kept back from non-critical use on each endpoint
+
 # Tweeting constants
 Tweet_status        = "status"
 Tweet_userID        = "user_id"
 Tweet_count         = "count"
+Tweet_duplicateError = 187 # Twitter error code for "Status is a duplicate."
 
 # Direct Messaging (DM) constants
-DM_delay            = 1
+DM_sendsPerWindow   = 1000 # Outbound DMs allowed per window, paced by token bucket
+DM_sendWindow       = 24*60*60 # seconds
+DM_drainTimeout     = 30 # seconds to wait for queued DMs to send when stopping
+DM_joiner           = "\n" # Between messages joined into one DM
+DM_pollPeriod       = 1 # minutes
+configWatchPeriod   = 1 # minutes between checks for edited config/schedule files
+processedDMRetention = 31 # days, longer than API returns DMs for
 DM_event            = "event"
 DM_events           = "events"
-#DM_ID               = "id"
+DM_count            = "count"
+DM_cursor           = "cursor"
+DM_nextCursor       = "next_cursor"
+DM_defaultPageSize  = 20 # Twitter's page size if "count" not given
+DM_pageSize         = 50 # Twitter's maximum
+DM_maxPages         = 15 # Twitter allows 15 requests per 15-minute window
+DM_ID               = "id"
 DM_type             = "type"
 DM_timestamp        = "created_timestamp"
 DM_messageCreate    = "message_create"
@@ -224,6 +382,8 @@ DM_text             = "text"
 # Direct Messaging (DM) commands
 DM_reset           = "reset"
 DM_printLog        = "log"
+DM_logSince        = "since"
+DM_logGameday      = "gameday"
 DM_defaultNumLines = 10
 DM_maxNumLines     = 100
 # Possible that a DM will fail if too many requested lines are this long, but unlikely
@@ -0,0 +1,182 @@
+# DMQueue.py holds the outbound DM queue, so sending DMs doesn't hold up
+# the bot. Messages to the same person are joined into as few DMs as fit,
+# and sending is paced by a token bucket within Twitter's limits.
+
+import threading
+from datetime import timedelta
+from collections import OrderedDict, deque
+
+from Constants import *
+
+class TokenBucket:
+    """Class that allows bursts up to a capacity, refilled at a
+    steady rate, to pace calls within a rate limit window"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    clock      = None
+    capacity   = 0
+    rate       = 0.0 # Tokens per second
+    tokens     = 0.0
+    lastRefill = 0.0
+
+    def __init__(self, capacity, window, clock):
+        self.clock = clock
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.tokens = capacity
+        self.lastRefill = clock.timestamp()
+
+    def refill(self):
+        now = self.clock.timestamp()
+        self.tokens = min(self.capacity, self.tokens + (now - self.lastRefill) * self.rate)
+        self.lastRefill = now
+
+    # Seconds until a token is available (0 if one is now)
+    def getWait(self):
+        self.refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.refill()
+        self.tokens -= 1
+
+class DMQueue:
+    """Class that queues outbound DMs per recipient and sends them
+    from a worker thread, pacing sends with a token bucket"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    send      = None # Function taking (userID, text) that posts one DM
+    clock     = None
+    scheduler = None # Runs drain events when there's no worker thread
+    bucket    = None
+    pending   = None # Recipient -> deque of (text, time queued)
+    condition = None
+    worker    = None
+    running   = False
+
+    # Send latency, from queueing a message to it being sent
+    numSent      = 0
+    lastLatency  = 0.0
+    maxLatency   = 0.0
+    totalLatency = 0.0
+
+    def __init__(self, send, clock, scheduler=None):
+        self.send = send
+        self.clock = clock
+        self.scheduler = scheduler
+        self.bucket = TokenBucket(DM_sendsPerWindow, DM_sendWindow, clock)
+        self.pending = OrderedDict()
+        self.condition = threading.Condition()
+
+    # Simulated time can't pass on another thread, so then queue sends as messages arrive
+    def start(self):
+        if self.clock.simulated or self.worker is not None:
+            return
+        self.running = True
+        self.worker = threading.Thread(target=self.run, name="DMQueue", daemon=True)
+        self.worker.start()
+
+    # Sends whatever is left (e.g. before a reset) then ends worker
+    def stop(self, timeout=DM_drainTimeout):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            self.worker = None
+        if self.scheduler is not None:
+            self.scheduler.cancel(Event_dmDrain)
+        self.flush(block=True)
+
+    def enqueue(self, userID, text):
+        with self.condition:
+            self.pending.setdefault(userID, deque()).append((text, self.clock.timestamp()))
+            self.condition.notify()
+        if self.worker is None:
+            self.flush()
+
+    def getDepth(self):
+        with self.condition:
+            return sum(len(messages) for messages in self.pending.values())
+
+    def getLatencyStats(self):
+        return {
+            "depth":  self.getDepth(),
+            "sent":   self.numSent,
+            "lastMs": self.lastLatency * 1000,
+            "maxMs":  self.maxLatency * 1000,
+            "avgMs":  self.totalLatency * 1000 / max(self.numSent, 1)
+        }
+
+    # Joins as many of recipient's oldest messages as fit in one DM
+    def takeBatch(self):
+        with self.condition:
+            if len(self.pending) == 0:
+                return None, []
+            userID, messages = next(iter(self.pending.items()))
+            batch = [messages.popleft()]
+            length = len(batch[0][0])
+            while len(messages) > 0 and \
+                  length + len(DM_joiner) + len(messages[0][0]) <= twitterDMCharLimit:
+                length += len(DM_joiner) + len(messages[0][0])
+                batch.append(messages.popleft())
+            if len(messages) == 0:
+                del self.pending[userID]
+            else:
+                # Rotate so one chatty recipient doesn't starve others
+                self.pending.move_to_end(userID)
+            return userID, batch
+
+    def sendBatch(self, userID, batch):
+        self.bucket.take()
+        self.send(userID, DM_joiner.join(text for text, queuedAt in batch))
+        now = self.clock.timestamp()
+        for text, queuedAt in batch:
+            latency = now - queuedAt
+            self.numSent += 1
+            self.lastLatency = latency
+            self.maxLatency = max(self.maxLatency, latency)
+            self.totalLatency += latency
+
+    # Sends what's queued on calling thread while tokens last. Then the rest waits for
+    # a drain event, so the shared clock isn't held up, unless blocking (e.g. stopping).
+    def flush(self, block=False):
+        while self.getDepth() > 0:
+            wait = self.bucket.getWait()
+            if wait > 0:
+                if self.scheduler is not None and not block:
+                    self.scheduler.schedule(Event_dmDrain,
+                                            self.clock.now() + timedelta(seconds=wait),
+                                            self.flush)
+                    return
+                self.clock.sleep(wait)
+            userID, batch = self.takeBatch()
+            if len(batch) > 0:
+                self.sendBatch(userID, batch)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and len(self.pending) == 0:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                # Wait for a token, but wake early to stop
+                wait = self.bucket.getWait()
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+            userID, batch = self.takeBatch()
+            if len(batch) > 0:
+                try:
+                    self.sendBatch(userID, batch)
+                except Exception as e:
+                    logging.error("Failure in DM queue: " + str(e))
@@ -3,74 +3,552 @@
 
 # Example API code taken from devloper.fantasydata.com
 import http.client, urllib.parse, urllib.error
+import codecs
+import gzip
+import hashlib
 import json
+import os
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from time import perf_counter
 
 from Constants import *
+import Utils
+from Clock import Clock
+from CircuitBreaker import CircuitBreaker
 
 headers = None
+clock = Clock()
+
+class ConnectionPool:
+    """Class that keeps HTTPS connections to the football API open
+    between requests so each score sample skips the TLS handshake"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    server         = None
+    secure         = True
+    maxIdle        = 0
+    timeout        = None
+    idle           = None # Open connections waiting to be reused
+    lock           = None
+
+    # Latency of most recent request, and totals since startup (seconds)
+    lastConnectTime  = 0.0
+    lastTransferTime = 0.0
+    numRequests      = 0
+    numConnects      = 0
+    totalConnectTime = 0.0
+    totalTransferTime = 0.0
+
+    def __init__(self, server, maxIdle=APIpoolSize, timeout=APItimeout, secure=True):
+        self.server = server
+        self.secure = secure
+        self.maxIdle = maxIdle
+        self.timeout = timeout
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if len(self.idle) > 0:
+                return self.idle.pop(), True
+        if self.secure:
+            return http.client.HTTPSConnection(self.server, timeout=self.timeout), False
+        return http.client.HTTPConnection(self.server, timeout=self.timeout), False
+
+    def release(self, conn):
+        with self.lock:
+            if len(self.idle) < self.maxIdle:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def closeAll(self):
+        with self.lock:
+            for conn in self.idle:
+                conn.close()
+            self.idle = []
+
+    # Returns (status, headers, body bytes). A reused connection the server
+    # has since dropped is reopened and the request retried once.
+    # If "parse" is given, a successful response's body is streamed through it
+    # instead, and what it returns is given in place of the bytes.
+    def request(self, method, path, body=None, requestHeaders={}, parse=None):
+        while True:
+            conn, reused = self.acquire()
+            try:
+                connectStart = perf_counter()
+                if conn.sock is None:
+                    conn.connect()
+                    self.numConnects += 1
+                connectTime = perf_counter() - connectStart
+
+                transferStart = perf_counter()
+                conn.request(method, path, body, requestHeaders)
+                response = conn.getresponse()
+                stream = self.getBodyStream(response)
+                if parse is not None and response.status == 200:
+                    data = parse(stream)
+                    keepAlive = self.skipRest(response)
+                else:
+                    data = stream.read()
+                    keepAlive = True
+                transferTime = perf_counter() - transferStart
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if reused:
+                    logging.info("Football API connection dropped, reconnecting: " + str(e))
+                    continue
+                raise
+            except (ValueError, EOFError):
+                conn.close() # Body only partly read when parse or decompression failed
+                raise
+
+            if response.will_close or not keepAlive:
+                conn.close()
+            else:
+                self.release(conn)
+
+            self.recordLatency(connectTime, transferTime)
+            return response.status, response.getheaders(), data
+
+    # Decompresses response as it's read, if server sent it gzipped
+    @staticmethod
+    def getBodyStream(response):
+        if response.getheader('Content-Encoding', '').lower() == 'gzip':
+            return gzip.GzipFile(fileobj=response, mode='rb')
+        return response
+
+    # A parse that stopped early leaves the rest of the body unread. It's read
+    # and dropped if short, so the connection can be reused; otherwise it's
+    # cheaper to drop the connection. Returns whether connection can be kept.
+    @staticmethod
+    def skipRest(response):
+        if response.length is None or response.length > APIdrainLimit:
+            return response.isclosed()
+        response.read()
+        return True
+
+    def recordLatency(self, connectTime, transferTime):
+        self.lastConnectTime = connectTime
+        self.lastTransferTime = transferTime
+        self.numRequests += 1
+        self.totalConnectTime += connectTime
+        self.totalTransferTime += transferTime
+        logging.info("Football API latency: connect {0:.0f} ms, transfer {1:.0f} ms"
+                     .format(connectTime * 1000, transferTime * 1000))
+
+    def getLatencyStats(self):
+        return {
+            "requests":         self.numRequests,
+            "connects":         self.numConnects,
+            "lastConnectMs":    self.lastConnectTime * 1000,
+            "lastTransferMs":   self.lastTransferTime * 1000,
+            "avgConnectMs":     self.totalConnectTime  * 1000 / max(self.numRequests, 1),
+            "avgTransferMs":    self.totalTransferTime * 1000 / max(self.numRequests, 1)
+        }
+
+connectionPool = ConnectionPool(APIserver)
+
+class APIQuota:
+    """Class that counts football API calls against the monthly
+    quota, persisting the count in storage between runs"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    monthlyLimit = APImonthlyQuota
+    month        = None # "YYYY-MM" the count belongs to
+    callsUsed    = 0
+    loaded       = False
+    lock         = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def setMonthlyLimit(self, monthlyLimit):
+        self.monthlyLimit = monthlyLimit
+
+    @staticmethod
+    def getMonthKey(now):
+        return now.strftime("%Y-%m")
+
+    # Lazily read count from storage, and start fresh each new month
+    def refresh(self, now):
+        if not self.loaded:
+            self.month = Utils.readStorageValue(Storage_FootballAPIMonth)
+            self.callsUsed = Utils.readStorageValue(Storage_FootballAPICalls, 0)
+            self.loaded = True
+
+        if self.month != self.getMonthKey(now):
+            self.month = self.getMonthKey(now)
+            self.callsUsed = 0
+
+    def getRemaining(self, now=None):
+        with self.lock:
+            self.refresh(now if now is not None else clock.now())
+            return max(self.monthlyLimit - self.callsUsed, 0)
+
+    def canCall(self, now=None):
+        return self.getRemaining(now) > 0
+
+    def recordCall(self, now=None):
+        with self.lock:
+            self.refresh(now if now is not None else clock.now())
+            self.callsUsed += 1
+            Utils.storeStorageValues({
+                Storage_FootballAPIMonth: self.month,
+                Storage_FootballAPICalls: self.callsUsed
+            })
+
+apiQuota = APIQuota()
+
+class ResponseCache:
+    """Class that keeps football API responses in memory and on disk,
+    with a time-to-live per endpoint and validators for conditional requests"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    directory = None
+    entries   = None # Request path to entry dictionary
+    lock      = None
+
+    def __init__(self, directory=footballCacheDir):
+        self.directory = directory
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    # Time-to-live depends on how quickly that kind of data changes
+    @staticmethod
+    def getTTL(APIpath):
+        for dataPath, ttl in APIcacheTTLs.items():
+            if dataPath in APIpath:
+                return ttl
+        return 0
+
+    def getFilePath(self, APIpath):
+        return os.path.join(self.directory,
+                            hashlib.sha1(APIpath.encode()).hexdigest() + ".json")
+
+    # Returns entry from memory, falling back to disk (such as after a restart)
+    def get(self, APIpath):
+        with self.lock:
+            if APIpath in self.entries:
+                return self.entries[APIpath]
+        try:
+            with open(self.getFilePath(APIpath), 'r') as inFile:
+                entry = json.load(inFile)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning("Failure to read football API cache: " + str(e))
+            return None
+        with self.lock:
+            self.entries[APIpath] = entry
+        return entry
+
+    def isFresh(self, APIpath, entry):
+        return clock.timestamp() - entry[Cache_storedAt] < self.getTTL(APIpath)
+
+    @staticmethod
+    def getValidators(entry):
+        validators = {}
+        if entry is None:
+            return validators
+        if entry[Cache_ETag] is not None:
+            validators['If-None-Match'] = entry[Cache_ETag]
+        if entry[Cache_lastModified] is not None:
+            validators['If-Modified-Since'] = entry[Cache_lastModified]
+        return validators
+
+    def store(self, APIpath, dataObj, responseHeaders):
+        responseHeaders = { name.lower(): value for name, value in responseHeaders }
+        entry = {
+            Cache_storedAt:     clock.timestamp(),
+            Cache_ETag:         responseHeaders.get('etag'),
+            Cache_lastModified: responseHeaders.get('last-modified'),
+            Cache_data:         dataObj
+        }
+        with self.lock:
+            self.entries[APIpath] = entry
+        self.write(APIpath, entry)
+
+    # Server confirmed (304) cached data is unchanged, so restart its TTL
+    def refresh(self, APIpath, entry):
+        entry[Cache_storedAt] = clock.timestamp()
+        self.write(APIpath, entry)
+
+    def write(self, APIpath, entry):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.getFilePath(APIpath), 'w') as outFile:
+                json.dump(entry, outFile)
+        except Exception as e:
+            logging.warning("Failure to write football API cache: " + str(e))
+
+responseCache = ResponseCache()
+
+# Pauses football calls, with backoff, while FantasyData keeps failing
+apiBreaker = CircuitBreaker(Breaker_football, clock)
+
+# Use another source of time, such as a simulated clock
+def useClock(newClock):
+    global clock
+    clock = newClock
+    apiBreaker.useClock(newClock)
+
+# Point client at another server, such as a local stand-in (plain HTTP)
+def useServer(server, secure=True):
+    global connectionPool
+    connectionPool.closeAll()
+    connectionPool = ConnectionPool(server, secure=secure)
 
 def updateHeaders(subscriptionKey):
     global headers
     headers = {
         # Request headers
         'Ocp-Apim-Subscription-Key': subscriptionKey,
+        'Accept-Encoding': 'gzip',
     }
 
-def readFootballAPI(basePath, dataPath, params=urllib.parse.urlencode({})):
+# "parse" streams a successful response into what's returned and cached, such as
+# just the games wanted from a whole season. Its results are cached under
+# "cacheKey", so differently parsed reads of one path don't mix.
+def readFootballAPI(basePath, dataPath, params=urllib.parse.urlencode({}), parse=None, cacheKey=None):
     if headers is None:
         logging.error("Error when calling football API: must define headers")
         return
+
+    APIpath = basePath + dataPath + "?%s" % params
+    if cacheKey is None:
+        cacheKey = APIpath
+    cached = responseCache.get(cacheKey)
+    if cached is not None and responseCache.isFresh(cacheKey, cached):
+        return cached[Cache_data]
+
+    if not apiQuota.canCall():
+        logging.error("Not calling football API: monthly quota of " +
+                      str(apiQuota.monthlyLimit) + " calls used up")
+        return staleFootballData(cached)
+    if not apiBreaker.allow():
+        logging.warning("Not calling football API while it's failing")
+        return staleFootballData(cached)
     try:
-        conn = http.client.HTTPSConnection(APIserver)
-        APIpath = basePath + dataPath + "?%s" % params
-        conn.request(APIget, APIpath, params, headers)
-        response = conn.getresponse()
-        dataStr = response.read().decode()
-        dataObj = json.loads(dataStr)
+        apiQuota.recordCall()
+        requestHeaders = dict(headers)
+        requestHeaders.update(responseCache.getValidators(cached))
+        status, responseHeaders, data = connectionPool.request(APIget, APIpath, params, requestHeaders, parse)
+
+        # Unchanged since cached
+        if status == 304 and cached is not None:
+            responseCache.refresh(cacheKey, cached)
+            return cached[Cache_data]
+        if status >= 500:
+            raise http.client.HTTPException("server error " + str(status))
+        apiBreaker.recordSuccess()
+
+        if parse is not None and status == 200:
+            dataObj = data
+        else:
+            dataStr = data.decode()
+            dataObj = json.loads(dataStr)
 
         #logging.info(dataStr)
-        conn.close()
+        if status == 200:
+            responseCache.store(cacheKey, dataObj, responseHeaders)
     except Exception as e:
         logging.error("Failure when accessing football API: " + str(e))
-        return None
+        apiBreaker.recordFailure()
+        return staleFootballData(cached)
 
     return dataObj
 
+# Out-of-date data beats none when the API can't be reached
+def staleFootballData(cached):
+    if cached is None:
+        return None
+    logging.warning("Using cached football data from " +
+                    datetime.fromtimestamp(cached[Cache_storedAt], tz).strftime(dtFormat))
+    return cached[Cache_data]
+
+class JSONStreamReader:
+    """Class that reads JSON values one at a time from a response stream,
+    so callers can keep just the parts they need and stop early"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    stream      = None
+    chunkSize   = APIchunkSize
+    decoder     = None
+    textDecoder = None
+    buffer      = ""
+    position    = 0
+    exhausted   = False
+
+    def __init__(self, stream, chunkSize=APIchunkSize):
+        self.stream = stream
+        self.chunkSize = chunkSize
+        self.decoder = json.JSONDecoder()
+        self.textDecoder = codecs.getincrementaldecoder('utf-8')()
+
+    # Returns False once stream has nothing more
+    def readMore(self):
+        if self.exhausted:
+            return False
+        chunk = self.stream.read(self.chunkSize)
+        self.exhausted = not chunk
+        self.buffer = self.buffer[self.position:] + self.textDecoder.decode(chunk, final=self.exhausted)
+        self.position = 0
+        return not self.exhausted
+
+    # Next character that isn't whitespace, without consuming it ("" at end)
+    def peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer) or not self.readMore():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError("football API response has " + repr(self.peek()) + " where " + char + " expected")
+        self.position += 1
+
+    # Consumes char if it's next
+    def accept(self, char):
+        if self.peek() == char:
+            self.position += 1
+            return True
+        return False
+
+    def readValue(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number at the end of buffer may continue in next chunk
+                if end < len(self.buffer) or self.exhausted:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self.readMore()
+
+# Yields each element of a top-level JSON array as it's read from stream, so
+# the whole document is never held at once. A top-level object (such as an
+# error) is yielded whole.
+def iterJSONArray(stream, chunkSize=APIchunkSize):
+    reader = JSONStreamReader(stream, chunkSize)
+    if not reader.accept("["):
+        yield reader.readValue()
+        return
+    if reader.accept("]"):
+        return
+    while True:
+        yield reader.readValue()
+        if reader.accept("]"):
+            return
+        reader.expect(",")
+
+# Reads only the fields kept from the first box score's "Game" object, and
+# stops there instead of parsing the player stats that follow. Returns the
+# same shape as the full response, so it's handled (and cached) the same way.
+def parseGameFields(stream, chunkSize=APIchunkSize):
+    reader = JSONStreamReader(stream, chunkSize)
+    # When error or exceeded cap, response is an object instead of a list
+    if not reader.accept("["):
+        return reader.readValue()
+    if reader.accept("]"):
+        return []
+    reader.expect("{")
+    while not reader.accept("}"):
+        key = reader.readValue()
+        reader.expect(":")
+        if key == APIfield_Game:
+            game = reader.readValue()
+            return [{ APIfield_Game: { field: game.get(field) for field in APIgameStateFields } }]
+        reader.readValue() # Skipped
+        reader.accept(",")
+    return [{}]
+
+# Keeps only team's games as response is read, rather than parsing every team's
+def parseTeamGames(stream, team):
+    teamGames = []
+    for game in iterJSONArray(stream):
+        # When error or exceeded cap, response is an object instead of a list
+        if "statusCode" in game:
+            return game
+        if game[APIfield_AwayTeam] == team or game[APIfield_HomeTeam] == team:
+            teamGames.append({
+                APIfield_GameID:       game[APIfield_GameID],
+                APIfield_DateTime:     game[APIfield_DateTime],
+                APIfield_AwayTeam:     game[APIfield_AwayTeam],
+                APIfield_HomeTeam:     game[APIfield_HomeTeam],
+                APIfield_AwayTeamName: game[APIfield_AwayTeamName],
+                APIfield_HomeTeamName: game[APIfield_HomeTeamName]
+            })
+    return teamGames
+
+# Returns (added, removed, changed) games of newGames compared to oldGames
+def diffFootballSchedules(oldGames, newGames):
+    oldByID = { game[APIfield_GameID]: game for game in oldGames }
+    newByID = { game[APIfield_GameID]: game for game in newGames }
+    added   = [game for gameID, game in newByID.items() if gameID not in oldByID]
+    removed = [game for gameID, game in oldByID.items() if gameID not in newByID]
+    changed = [(oldByID[gameID], game) for gameID, game in newByID.items()
+               if gameID in oldByID and oldByID[gameID] != game]
+    return added, removed, changed
+
+def describeGame(game):
+    return "{0} at {1} ({2})".format(game[APIfield_AwayTeam], game[APIfield_HomeTeam],
+                                    game[APIfield_DateTime] or "time TBD")
+
 def updateFootballSchedule(year, team):
     # Convert gameID if not string
     if isinstance(year, int):
         year = str(year)
 
-    fullSchedule = readFootballAPI(APIscorespath, APIschedule + year)
+    try:
+        scheduleGT = readFootballAPI(APIscorespath, APIschedule + year,
+                                     parse=lambda stream: parseTeamGames(stream, team),
+                                     cacheKey=APIscorespath + APIschedule + year + "#" + team)
+    except Exception as e:
+        logging.error("Failure to parse football schedule from FantasyData: " + str(e))
+        return None
+
+    if scheduleGT is None:
+        return None
 
     # When error or exceeded cap, this key exists. Otherwise it's a list.
-    if "statusCode" in fullSchedule and fullSchedule["statusCode"] != 200:
+    if "statusCode" in scheduleGT and scheduleGT["statusCode"] != 200:
         logging.error("Failure to obtain football schedule from FantasyData: " +
-                      str(fullSchedule["message"]) if "message" in fullSchedule else "(unknown)")
+                      str(scheduleGT["message"]) if "message" in scheduleGT else "(unknown)")
         return None
 
-    scheduleGT = []
+    # Only games that changed are logged, and file is left alone if none did
+    footballSchedule.refresh()
+    added, removed, changed = diffFootballSchedules(footballSchedule.games, scheduleGT)
+    if len(added) == 0 and len(removed) == 0 and len(changed) == 0 and footballSchedule.fileStat is not None:
+        logging.info("Football schedule unchanged")
+        return scheduleGT
 
-    try:
-        for game in fullSchedule:
-            if  game[APIfield_AwayTeam] == team or \
-                game[APIfield_HomeTeam] == team:
-                newGame = {
-                    APIfield_GameID:       game[APIfield_GameID],
-                    APIfield_DateTime:     game[APIfield_DateTime],
-                    APIfield_AwayTeam:     game[APIfield_AwayTeam],
-                    APIfield_HomeTeam:     game[APIfield_HomeTeam],
-                    APIfield_AwayTeamName: game[APIfield_AwayTeamName],
-                    APIfield_HomeTeamName: game[APIfield_HomeTeamName]
-                }
-                scheduleGT.append(newGame)
-    except Exception as e:
-        logging.error("Failure to parse football schedule from FantasyData: " + str(e))
-        return None
+    for game in added:
+        logging.info("Football schedule added: " + describeGame(game))
+    for game in removed:
+        logging.info("Football schedule removed: " + describeGame(game))
+    for oldGame, newGame in changed:
+        logging.info("Football schedule changed: " + describeGame(oldGame) + " -> " + describeGame(newGame))
 
-    # Write schedule to log and to file for later use
-    logging.info("Got football schedule")
-    #logging.info(json.dumps(scheduleGT, indent=4))
     try:
         with open(scheduleFootballFile, 'w') as outFile:
             json.dump(scheduleGT, outFile, indent=4)
@@ -78,23 +556,120 @@ def updateFootballSchedule(year, team):
         logging.error("Failure to write football schedule to file: " + str(e))
         return None
 
+    footballSchedule.index(scheduleGT)
     return scheduleGT
 
-def readFootballSchedule():
+def readFootballSchedule(fileName=scheduleFootballFile):
     try:
-        with open(scheduleFootballFile, 'r') as inFile:
+        with open(fileName, 'r') as inFile:
             return json.load(inFile)
     except Exception as e:
         logging.error("Failure to read football schedule from file: " + str(e))
         return None
 
+# Football API times are local to the whistle
+def parseGameDateTime(dateTimeStr):
+    return tz.localize(datetime.strptime(dateTimeStr, dtFormatFootballAPI))
+
+class FootballSchedule:
+    """Class that holds the football schedule with kickoffs parsed
+    once and indexed by local date, reloading only when the file changes"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    fileName = None
+    fileStat = None # (mtime, size) of file when loaded
+    games    = None # As stored in file
+    byDate   = None # Local date -> game
+    kickoffs = None # Game ID -> kickoff date/time
+    ordered  = None # (kickoff, game) in kickoff order, for "next game"
+    orderedKickoffs = None # Just kickoffs of "ordered", to bisect
+
+    def __init__(self, fileName=scheduleFootballFile):
+        self.fileName = fileName
+        self.index([])
+        self.fileStat = None # Nothing loaded yet
+
+    def index(self, games):
+        byDate = {}
+        kickoffs = {}
+        ordered = []
+        for game in games:
+            # Games without a set time yet aren't any day's GAMEDAY
+            if game[APIfield_DateTime] is None:
+                continue
+            kickoff = parseGameDateTime(game[APIfield_DateTime])
+            byDate.setdefault(kickoff.date(), game)
+            kickoffs[game[APIfield_GameID]] = kickoff
+            ordered.append((kickoff, game))
+        ordered.sort(key=lambda entry: entry[0])
+        orderedKickoffs = [kickoff for kickoff, game in ordered]
+        # Swapped in together, so a reader never sees a half-built index
+        self.games, self.byDate, self.kickoffs, self.ordered, self.orderedKickoffs = \
+            list(games), byDate, kickoffs, ordered, orderedKickoffs
+        self.fileStat = self.getFileStat()
+
+    def getFileStat(self):
+        try:
+            stat = os.stat(self.fileName)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    # Cheap to call often: file is only read again if it has changed
+    def refresh(self):
+        stat = self.getFileStat()
+        if stat is None or stat == self.fileStat:
+            return
+        games = readFootballSchedule(self.fileName)
+        if games is not None:
+            self.index(games)
+
+    def getGameOn(self, date):
+        self.refresh()
+        return self.byDate.get(date)
+
+    def getKickoff(self, game):
+        return self.kickoffs.get(game[APIfield_GameID])
+
+    # First game kicking off at or after dt, or None
+    def getNextGame(self, dt):
+        self.refresh()
+        ordered, orderedKickoffs = self.ordered, self.orderedKickoffs
+        position = bisect_left(orderedKickoffs, dt)
+        if position >= len(ordered):
+            return None
+        return ordered[position][1]
+
+    # Games from date through end of its month, including any on date itself
+    def countGamesLeftInMonth(self, date):
+        self.refresh()
+        return sum(1 for kickoff, game in self.ordered
+                   if kickoff.year == date.year and kickoff.month == date.month and
+                      kickoff.date() >= date)
+
+footballSchedule = FootballSchedule()
+
 def getGameState(gameID):
     # Convert gameID if not string
     if isinstance(gameID, int):
         gameID = str(gameID)
 
-    gameData = readFootballAPI(APIstatspath, APIboxscore + gameID)
+    gameData = readFootballAPI(APIstatspath, APIboxscore + gameID, parse=parseGameFields)
+    if gameData is None:
+        return None
+    # When error or exceeded cap, this key exists. Otherwise it's a list.
+    if "statusCode" in gameData:
+        logging.error("Failure to obtain game state from FantasyData: " +
+                      str(gameData.get("message", "(unknown)")))
+        return None
     # Retrieved one game entry, so first and only in array
+    # (Missing, the sample is treated like a failed one)
+    if len(gameData) == 0 or APIfield_Game not in gameData[0]:
+        logging.error("Failure to find game in FantasyData box score for game " + str(gameID))
+        return None
     gameState = {
         APIfield_HomeTeam:      gameData[0][APIfield_Game][APIfield_HomeTeam],
         APIfield_AwayTeam:      gameData[0][APIfield_Game][APIfield_AwayTeam],
@@ -115,6 +690,41 @@ def gameStateMissingData(gameState):
            gameState[APIfield_AwayTeamScore] is None or \
            gameState[APIfield_Period]        is None
 
+# Spreads remaining monthly quota over remaining games, then spends more of it
+# when scores matter most. Returns minutes until next sample, or None if
+# the quota can't afford another sample.
+def getScoreSamplingPeriod(myTeam, gameState, gameDate, now, gamesLeftThisMonth=1):
+    callsLeft = apiQuota.getRemaining(now) - APIquotaReserve
+    if callsLeft <= 0:
+        return None
+
+    # Share of calls for this game, then spread over time left in it
+    callsForGame = callsLeft / max(gamesLeftThisMonth, 1)
+    gameEnd = gameDate + timedelta(hours=expectedGameHours)
+    minutesLeft = max((gameEnd - now).total_seconds() / secPerMin, minGameMinutesLeft)
+    basePeriod = minutesLeft / callsForGame
+
+    period = basePeriod
+    if not gameStateMissingData(gameState):
+        margin = abs(gameState[APIfield_HomeTeamScore] - gameState[APIfield_AwayTeamScore])
+        period = period * scoreSamplingWeight(gameState[APIfield_Period], margin)
+
+    # Never cap below the even pace, since that could run out before game ends
+    return min(max(period, minScoreSamplingPeriod), max(maxScoreSamplingPeriod, basePeriod))
+
+def scoreSamplingWeight(period, margin):
+    if period == APIdata_Halftime:
+        return samplingWeightHalftime
+
+    weight = 1.0
+    if period == APIdata_FourthQuarter or str(period).startswith(APIdata_Overtime):
+        weight = weight * samplingWeightFourthQuarter
+    if margin <= closeGameMargin:
+        weight = weight * samplingWeightClose
+    elif margin >= blowoutMargin:
+        weight = weight * samplingWeightBlowout
+    return weight
+
 def opposingTeam(myTeam, gameState):
     if gameState[APIfield_HomeTeam] == myTeam:
         return gameState[APIfield_AwayTeam]
@@ -14,15 +14,25 @@ from TwitterAPI import TwitterAPI
 # For configuration reading
 # (Thanks: http://stackoverflow.com/questions/2835559/parsing-values-from-a-json-file-in-python)
 import json
-from datetime import datetime
-from time import sleep
-from random import randint
-from random import random
+import os
+from datetime import datetime, timedelta
+from functools import lru_cache
 from sys import stdout
 
 from Constants import *
 import Utils
 import Football
+from Schedule import ScheduleIndex
+from Scheduler import EventScheduler
+from Clock import Clock
+from TweetHistory import TweetHistory
+from TweetOutbox import TweetOutbox
+from DMQueue import DMQueue
+from CircuitBreaker import CircuitBreaker
+from RateLimits import RateLimitTracker
+from ConfigWatcher import FileWatcher
+from WhistleText import WhistleTextGenerator
+from StandIn import StandInTwitterClient
 
 class Whistler:
     """Class that holds functionality for processing
@@ -36,29 +46,65 @@ class Whistler:
     scheduleConfig       = None
     log                  = None
     t                    = None
+    scheduler            = None
+    dmQueue              = None
+    rateLimits           = None
+    breakers             = None # Dependency name -> circuit breaker (football's is in Football)
+    clock                = None
+    standInServer        = None
+    footballEnabled      = False
+    DMPollPeriod         = DM_pollPeriod
+    configWatcher        = None
+    configCheckPeriod    = configWatchPeriod
 
     dt                   = None
     curDay               = None
 
-    dailySchedule        = None
-    scheduleWhistled     = False
-    prevTweets           = None
+    scheduleIndex        = None
+    tweetHistory         = None
+    tweetOutbox          = None
+    whistleText          = None
     tweetRegularSchedule = True
     reset                = False
 
     wtwbToday            = False
     wtwbTime             = None
 
+    newestDMTimestamp    = 0 # High-water mark from "getNewDMs", stored once all are handled
     footballConnected    = False
     GAMEDAYInfo          = None
+    GAMEDAYKickoff       = None # Kickoff of GAMEDAYInfo's game, already parsed
+    GAMEDAYLogStart      = None # Pregame time of latest GAMEDAY, for "log gameday"
     gameState            = None
+    lastPoll             = None # When "gameState" was last sampled
+    GAMEDAYResume        = None # When to resume GAMEDAY events restored from checkpoint
     GAMEDAYPhase         = GamedayPhase.notGameday
 
     # ---------------------
     # --- SETUP METHODS ---
     # ---------------------
 
-    def __init__(self):
+    # A simulated clock and stand-in server allow running quickly offline
+    # (Defaults come from Constants.py; in the signature, these names would be
+    # the class members above instead.)
+    def __init__(self, clock=None, standIn=None, football=None):
+        self.clock = clock if clock is not None else Clock()
+        self.standInServer = standIn if standIn is not None else standInServer
+        self.footballEnabled = football if football is not None else footballEnabled
+        self.scheduler = EventScheduler(self.clock)
+        self.dmQueue = DMQueue(self.postDM, self.clock, self.scheduler)
+        self.rateLimits = RateLimitTracker(self.clock)
+        self.breakers = {
+            dependency: CircuitBreaker(dependency, self.clock)
+            for dependency in (Breaker_twitterPost, Breaker_twitterRead, Breaker_DMs)
+        }
+        self.tweetHistory = TweetHistory()
+        self.tweetHistory.load()
+        self.tweetOutbox = TweetOutbox()
+        self.whistleText = WhistleTextGenerator()
+        self.whistleText.load()
+        Football.useClock(self.clock)
+        self.configWatcher = FileWatcher([APIConfigFile, scheduleConfigFile])
         # Run "daily check" with argument True to indicate this is on boot
         self.dailyCheck(True)
 
@@ -73,17 +119,16 @@ class Whistler:
         setupSuccess = self.logSetup()      and setupSuccess
 
         # This part of setup should not break the program if it fails
-        # Note: removed this because constantly failing; maybe API changed, maybe COVID-19 scheduling
-        # if booting:
-        #     self.footballConnected = self.footballSetup()
-        self.footballConnected = False
+        # Note: disabled by default because constantly failing; maybe API changed, maybe COVID-19 scheduling
+        if booting:
+            self.footballConnected = self.footballEnabled and self.footballSetup()
 
         return setupSuccess
 
     def configSetup(self):
         try:
-            with open(APIConfigFile, encoding='utf-8') as dataFile:
-                self.APIConfig = json.loads(dataFile.read())
+            self.APIConfig = self.loadAPIConfig()
+            self.configWatcher.remember(APIConfigFile)
         except Exception as e:
             errorStr = "Error when loading configuration: " + str(e)
             self.whistlerError(errorStr)
@@ -92,12 +137,12 @@ class Whistler:
         return True
 
     def twitterSetup(self):
+        if self.standInServer is not None:
+            self.t = StandInTwitterClient(self.standInServer)
+            return True
+
         try:
-            self.t = TwitterAPI(
-                self.APIConfig[config_consumerKey],
-                self.APIConfig[config_consumerSecret],
-                self.APIConfig[config_accessToken],
-                self.APIConfig[config_accessTokenSecret])
+            self.t = self.makeTwitterClient(self.APIConfig)
         except Exception as e:
             errorStr = "Error when authenticating with Twitter: " + str(e)
             self.whistlerError(errorStr)
@@ -107,8 +152,8 @@ class Whistler:
 
     def scheduleSetup(self):
         try:
-            with open(scheduleConfigFile, encoding='utf-8') as dataFile:
-                self.scheduleConfig = json.loads(dataFile.read())
+            self.applyScheduleConfig(*self.loadScheduleConfig())
+            self.configWatcher.remember(scheduleConfigFile)
         except Exception as e:
             errorStr = "Error when loading schedule: " + str(e)
             self.whistlerError(errorStr)
@@ -116,6 +161,91 @@ class Whistler:
 
         return True
 
+    # Raises if file can't be read or lacks something the bot needs
+    @staticmethod
+    def loadAPIConfig():
+        with open(APIConfigFile, encoding='utf-8') as dataFile:
+            APIConfig = json.loads(dataFile.read())
+        for key in configRequiredKeys:
+            if key not in APIConfig:
+                raise KeyError("configuration missing " + key)
+        return APIConfig
+
+    @staticmethod
+    def makeTwitterClient(APIConfig):
+        return TwitterAPI(
+            APIConfig[config_consumerKey],
+            APIConfig[config_consumerSecret],
+            APIConfig[config_accessToken],
+            APIConfig[config_accessTokenSecret])
+
+    # Returns schedule and its compiled index, raising if either is invalid
+    @staticmethod
+    def loadScheduleConfig():
+        with open(scheduleConfigFile, encoding='utf-8') as dataFile:
+            scheduleConfig = json.loads(dataFile.read())
+        for section, keys in ((config_WTWB,     (config_WTWBevent, config_WTWBreminder)),
+                              (config_football, (config_updateMonths, config_updateWeekday, config_pregameHours))):
+            for key in keys:
+                if key not in scheduleConfig[section]:
+                    raise KeyError("schedule missing " + section + " " + key)
+        # Compile regular schedule once so each wake is a quick lookup
+        return scheduleConfig, ScheduleIndex(scheduleConfig[config_regularSchedule])
+
+    def applyScheduleConfig(self, scheduleConfig, scheduleIndex):
+        self.scheduleConfig, self.scheduleIndex = scheduleConfig, scheduleIndex
+        Football.apiQuota.setMonthlyLimit(
+            self.scheduleConfig[config_football].get(config_monthlyQuota, APImonthlyQuota))
+
+    # Reloads only files edited since they were loaded. Each is validated in full
+    # before being swapped in, so a bad edit leaves the previous one running.
+    def reloadChangedFiles(self):
+        for fileName in self.configWatcher.getChanged():
+            if fileName == os.path.abspath(APIConfigFile):
+                self.reloadAPIConfig()
+            elif fileName == os.path.abspath(scheduleConfigFile):
+                self.reloadScheduleConfig()
+            self.configWatcher.remember(fileName)
+
+    def reloadAPIConfig(self):
+        try:
+            APIConfig = self.loadAPIConfig()
+            # Client kept unless credentials changed
+            client = self.t
+            if self.standInServer is None and \
+               any(APIConfig[key] != self.APIConfig.get(key) for key in configTwitterKeys):
+                client = self.makeTwitterClient(APIConfig)
+        except Exception as e:
+            self.whistlerError("Keeping previous configuration, since edited one failed: " + str(e))
+            return
+
+        fantasyDataKeyChanged = APIConfig[config_fantasyDataKey] != self.APIConfig.get(config_fantasyDataKey)
+        self.APIConfig, self.t = APIConfig, client
+        if self.footballConnected and fantasyDataKeyChanged:
+            Football.updateHeaders(APIConfig[config_fantasyDataKey])
+        logging.info("Reloaded configuration")
+
+    def reloadScheduleConfig(self):
+        try:
+            scheduleConfig, scheduleIndex = self.loadScheduleConfig()
+        except Exception as e:
+            self.whistlerError("Keeping previous schedule, since edited one failed: " + str(e))
+            return
+
+        self.applyScheduleConfig(scheduleConfig, scheduleIndex)
+        logging.info("Reloaded schedule")
+
+        # Redo today's decisions that came from schedule
+        self.updateDateTime()
+        wasWtwbToday, oldWtwbTime = self.wtwbToday, self.wtwbTime
+        self.checkIfWTWBDay()
+        if self.wtwbToday != wasWtwbToday or self.wtwbTime != oldWtwbTime:
+            self.scheduler.cancel(Event_wtwbCeremony)
+            self.scheduler.cancel(Event_wtwbInMemoriam)
+            if self.wtwbToday:
+                self.wtwbProcessing()
+        self.scheduleNextWhistle()
+
     def logSetup(self):
         retStr = Utils.logFileSetup()
         if retStr == "":
@@ -126,6 +256,8 @@ class Whistler:
             return False # If error during setup, stop running
 
     def footballSetup(self):
+        if self.standInServer is not None:
+            Football.useServer(self.standInServer, secure=False)
         Football.updateHeaders(self.APIConfig[config_fantasyDataKey])
         if Football.updateFootballSchedule(self.dt.year, APIdata_GTTeam) is not None:
             return True
@@ -137,13 +269,41 @@ class Whistler:
     # --- ERROR HANDLING METHODS ---
     # ------------------------------
 
-    def whistlerError(self, text):
+    # Rather than sleeping, failure pauses calls to only the dependency that failed
+    # (if one is given), so scheduled whistles carry on
+    def whistlerError(self, text, dependency=None):
         logging.error(text)
+        if dependency is not None:
+            self.breakers[dependency].recordFailure()
         self.directMessageOnError(text)
         # Show logs from the error
         self.directMessageOnError(Utils.getLog(DM_defaultNumLines))
-        self.directMessageOnError("Sleeping for a while before continuing...")
-        sleep(errorDelay * secPerMin) # Do nothing for a while to prevent spammy worst-case scenarios
+
+    # Server errors, throttling and refused credentials count as failures, since
+    # retrying soon won't help; other replies mean service is up
+    def recordResponse(self, dependency, statusCode):
+        if statusCode >= 500 or statusCode in breakerFailureStatuses:
+            self.breakers[dependency].recordFailure()
+        else:
+            self.breakers[dependency].recordSuccess()
+
+    # Every Twitter call goes through here so its endpoint's rate limit headers are tracked
+    def twitterRequest(self, path, params=None):
+        r = self.t.request(path, params)
+        self.rateLimits.update(path, r.headers)
+        return r
+
+    # Checked before a call (and before its circuit breaker, so a probe isn't wasted)
+    def canCallTwitter(self, path, critical=False):
+        if self.rateLimits.allow(path, critical):
+            return True
+        logging.warning("Not calling " + path + " to stay within Twitter rate limit")
+        return False
+
+    # Setup failed or loop crashed, so bot is about to exit; pause first so a
+    # restart doesn't spam in a loop (nothing can be whistled meanwhile anyway)
+    def pauseBeforeExit(self):
+        self.clock.sleep(errorDelay * secPerMin)
 
     def directMessageOnError(self, errorText):
         if self.t is not None and \
@@ -160,13 +320,14 @@ class Whistler:
         # Update date and time before doing anything
         self.updateDateTime()
 
-        # Run full setup each day and on boot
-        if not self.fullSetup(booting):
+        # Run full setup on boot; after that, only files edited since are reloaded
+        if not booting:
+            self.tweetRegularSchedule = True
+            self.reloadChangedFiles()
+        elif not self.fullSetup(booting):
             # If any setup did not succeed
-            if booting:
-                self.whistlerError("Error during boot setup!")
-            else:
-                self.whistlerError("Error during daily check setup!")
+            self.whistlerError("Error during boot setup!")
+            self.pauseBeforeExit()
             return False
 
         self.setWeekdayAndLoadSchedule()
@@ -177,7 +338,7 @@ class Whistler:
 
         if self.footballConnected:
             self.updateIfFootballScheduleUpdateDay()
-            self.getInfoIfGAMEDAY()
+            self.getInfoIfGAMEDAY(booting)
 
         logging.info("Ran daily check:")
         logging.info(" - Current Day: " + str(self.curDay))
@@ -192,11 +353,10 @@ class Whistler:
         return True
 
     def updateDateTime(self):
-        self.dt = datetime.now(tz)
+        self.dt = self.clock.now()
 
     def setWeekdayAndLoadSchedule(self):
         self.curDay = self.dt.weekday()
-        self.dailySchedule = self.scheduleConfig[config_regularSchedule][self.curDay]
 
     # Sent at midnight the night before because of when daily check occurs
     def remindIfWTWBReminderDay(self):
@@ -220,84 +380,121 @@ class Whistler:
            self.curDay is self.scheduleConfig[config_football][config_updateWeekday]:
             Football.updateFootballSchedule(self.dt.year, APIdata_GTTeam)
 
-    def getInfoIfGAMEDAY(self):
-        for game in Football.readFootballSchedule():
-            if game[APIfield_DateTime] is not None:
-                gameDate = datetime.strptime(game[APIfield_DateTime], dtFormatFootballAPI)
-                if self.dt.year  == gameDate.year  and \
-                   self.dt.month == gameDate.month and \
-                   self.dt.day   == gameDate.day:
-                    self.GAMEDAYInfo = game
-                    # TODO: Needs testing
-                    # For each of these states, also set variables
-                    # that would be set if progressed through normally
-
-                    # If midnight hour
-                    if self.dt.hour is 0:
-                        self.GAMEDAYPhase = GamedayPhase.midnightGameday
-                    # If before pregame time
-                    elif self.isFirstTimeBeforeSecond(self.dt.hour,
-                                                      self.dt.minute,
-                                                      gameDate.hour - self.scheduleConfig[config_football][config_pregameHours],
-                                                      gameDate.minute):
-                        self.tweetRegularSchedule = False
-                        self.GAMEDAYPhase = GamedayPhase.earlyGameday
-                    # If before game begins
-                    elif self.isFirstTimeBeforeSecond(self.dt.hour,
-                                                      self.dt.minute,
-                                                      gameDate.hour,
-                                                      gameDate.minute):
-                        self.tweetRegularSchedule = False
-                        self.GAMEDAYPhase = GamedayPhase.preGame
-                    # If after game has begun (and if game over, will learn immediately)
-                    else:
-                        self.tweetRegularSchedule = False
-                        self.gameState = Football.getGameState(self.GAMEDAYInfo[APIfield_GameID])
-                        self.GAMEDAYPhase = GamedayPhase.gameOn
+    def getInfoIfGAMEDAY(self, booting=False):
+        game = Football.footballSchedule.getGameOn(self.dt.date())
+        if game is not None:
+            gameDate = Football.footballSchedule.getKickoff(game)
+            self.GAMEDAYInfo = game
+            self.GAMEDAYKickoff = gameDate
+            self.GAMEDAYLogStart = self.getPregameDateTime()
+            # TODO: Needs testing
+            # For each of these states, also set variables
+            # that would be set if progressed through normally
+
+            # If midnight hour
+            if self.dt.hour is 0:
+                self.GAMEDAYPhase = GamedayPhase.midnightGameday
+            # If before pregame time
+            elif self.isFirstTimeBeforeSecond(self.dt.hour,
+                                              self.dt.minute,
+                                              gameDate.hour - self.scheduleConfig[config_football][config_pregameHours],
+                                              gameDate.minute):
+                self.tweetRegularSchedule = False
+                self.GAMEDAYPhase = GamedayPhase.earlyGameday
+            # If before game begins
+            elif self.isFirstTimeBeforeSecond(self.dt.hour,
+                                              self.dt.minute,
+                                              gameDate.hour,
+                                              gameDate.minute):
+                self.tweetRegularSchedule = False
+                self.GAMEDAYPhase = GamedayPhase.preGame
+            else:
+                self.tweetRegularSchedule = False
+                self.GAMEDAYPhase = GamedayPhase.gameOn
 
-                    return
+            # After a restart, pick up the game where it was left
+            if booting and self.restoreGamedayCheckpoint():
+                return
+            # If after game has begun (and if game over, will learn immediately)
+            if self.GAMEDAYPhase is GamedayPhase.gameOn:
+                self.gameState = Football.getGameState(self.GAMEDAYInfo[APIfield_GameID])
+                self.lastPoll = self.dt
+            self.checkpointGameday()
+            return
 
         # If no game today and did not already return
         self.GAMEDAYPhase = GamedayPhase.notGameday
 
-    # Ignores special day considerations
-    def getNextScheduledWhistle(self):
-        nextTime = self.getMidnight()
-        self.dt = datetime.now(tz)
-        # For every time on the schedule today
-        for time in self.dailySchedule:
-            # If scheduled time is in the future
-            if self.isDTBeforeThisTime(time[config_hour], time[config_minute]):
-                # If scheduled time is sooner than working time
-                if time[config_hour] < nextTime[config_hour] or \
-                       (time[config_hour]  == nextTime[config_hour] and
-                        time[config_minute] < nextTime[config_minute]):
-                    nextTime = time
-
-        return nextTime
-
-    def sleepUntil(self, nextTime):
-        self.dt = datetime.now(tz)
-        secToNextTime = (nextTime[config_hour]    - self.dt.hour  ) * minPerHour * secPerMin + \
-                        (nextTime[config_minute]  - self.dt.minute) * secPerMin  + \
-                        (minSecond - self.dt.second)
-                        # Find time difference to calculate total sleep time.
-                        # If no more scheduled times, calculation based on 24h:00m for daily check.
-                        # Next time should always be beginning of minute, so subtract off
-                        # the seconds we are currently already into the current minute.
-                        # Extra milliseconds mean wake occurs within the
-                        # first second of the minute, which is acceptable noise.
+    # Saved on every GAMEDAY transition and score sample
+    def checkpointGameday(self):
+        if self.GAMEDAYInfo is None:
+            return
+        Utils.storeGamedayCheckpoint(self.GAMEDAYPhase, self.GAMEDAYInfo,
+                                     self.gameState, self.lastPoll, self.clock.now())
+
+    # Restores today's game from checkpoint, unless clock shows the phase
+    # has since moved on. The last score is kept, so one made while down is
+    # still whistled, and sampling resumes on schedule instead of right away.
+    # Returns whether restored.
+    def restoreGamedayCheckpoint(self):
+        checkpoint = Utils.readGamedayCheckpoint()
+        if checkpoint is None or checkpoint[Checkpoint_gameInfo] is None or \
+           checkpoint[Checkpoint_gameInfo][APIfield_GameID] != self.GAMEDAYInfo[APIfield_GameID] or \
+           checkpoint[Checkpoint_phase].value < self.GAMEDAYPhase.value:
+            return False
 
-        try:
-            sleep(secToNextTime) # Sleep until next time
-        except Exception as e:
-            errorStr = "Error when trying to sleep: " + str(e)
-            self.whistlerError(errorStr)
+        self.GAMEDAYPhase = checkpoint[Checkpoint_phase]
+        self.gameState = checkpoint[Checkpoint_gameState]
+        self.lastPoll = checkpoint[Checkpoint_lastPoll]
+        self.tweetRegularSchedule = self.GAMEDAYPhase is GamedayPhase.earlyGameday or \
+                                    self.GAMEDAYPhase is GamedayPhase.postGame
+        # Resume when restored phase was next due, not straight away
+        if self.GAMEDAYPhase is GamedayPhase.earlyGameday or self.GAMEDAYPhase is GamedayPhase.preGame:
+            self.GAMEDAYResume = max(self.dt, self.getPregameDateTime())
+        elif self.GAMEDAYPhase is GamedayPhase.toeHitLeather:
+            self.GAMEDAYResume = max(self.dt, self.getGameDateTime())
+        elif self.GAMEDAYPhase is GamedayPhase.gameOn and self.lastPoll is not None:
+            self.GAMEDAYResume = max(self.dt, self.getNextScorePollTime(self.lastPoll))
+
+        logging.info("Resumed " + str(self.GAMEDAYPhase) + " from checkpoint saved " +
+                     checkpoint[Checkpoint_savedAt].strftime(dtFormat))
+        return True
+
+    # Parsed once when GAMEDAY is found, rather than on every use
+    def getGameDateTime(self):
+        return self.GAMEDAYKickoff
+
+    # Counted from "since" (now by default), such as the last sample before a restart
+    def getNextScorePollTime(self, since=None):
+        period = Football.getScoreSamplingPeriod(APIdata_GTTeam,
+                                                 self.gameState,
+                                                 self.getGameDateTime(),
+                                                 self.dt,
+                                                 self.getGamesLeftThisMonth())
+        # Out of quota, so can't follow game any further
+        if period is None:
+            logging.warning("Football API quota used up, no longer following game")
+            self.GAMEDAYPhase = GamedayPhase.postGame
+            return self.dt
+        return (since if since is not None else self.dt) + timedelta(minutes=period)
+
+    # Includes today's game, so quota is shared with games still to come
+    def getGamesLeftThisMonth(self):
+        return Football.footballSchedule.countGamesLeftInMonth(self.dt.date())
+
+    def getPregameDateTime(self):
+        return self.getGameDateTime() - \
+               timedelta(hours=self.scheduleConfig[config_football][config_pregameHours])
 
     @staticmethod
     def getMidnight():
         return { config_hour: maxHour, config_minute: minMinute }
 
+    # Start of the following day, localized so DST changes are respected
+    def getNextMidnightDateTime(self):
+        tomorrow = self.dt.date() + timedelta(days=1)
+        return tz.localize(datetime(tomorrow.year, tomorrow.month, tomorrow.day))
+
     # Checks down to the minute if at midnight
     def isMidnight(self):
         mn = self.getMidnight()
@@ -319,112 +516,192 @@ class Whistler:
                self.dt.month == month and \
                self.dt.day   == day
 
-    # Note: entire day is spent in this method
-    def wtwbProcessing(self):
-        # Note: like most methods, this assumes "dt" is current
-        if self.isDTBeforeThisTime(self.wtwbTime[config_hour], self.wtwbTime[config_minute]):
-            # Remain silent during day until ceremony
-            self.sleepUntil({
-                config_hour: self.wtwbTime[config_hour],
-                config_minute: self.wtwbTime[config_minute]
-            })
+    # ---------------------
+    # --- EVENT METHODS ---
+    # ---------------------
+
+    # Each of these runs when its deadline is reached in the scheduler,
+    # does its work without sleeping, then schedules its next occurrence.
+
+    def startEvents(self):
+        self.updateDateTime()
+        self.scheduler.schedule(Event_dailyCheck, self.getNextMidnightDateTime(), self.dailyCheckEvent)
+        self.scheduler.schedule(Event_processDMs, self.dt, self.processDMsEvent)
+        self.scheduler.schedule(Event_reconcileTweets, self.dt, self.reconcileTweetsEvent)
+        self.scheduler.schedule(Event_configWatch,
+                                self.dt + timedelta(minutes=self.configCheckPeriod),
+                                self.configWatchEvent)
+        # After reconciling, so tweets that went up just before a stop aren't posted again
+        if self.tweetOutbox.hasPending():
+            self.scheduler.schedule(Event_tweetOutbox, self.dt, self.tweetOutboxEvent)
+        self.scheduleNextWhistle()
+        self.scheduleDayEvents()
+
+    def dailyCheckEvent(self):
+        self.updateDateTime()
+
+        # Ensure that a football game isn't currently still going from earlier in the evening
+        if self.GAMEDAYPhase is not GamedayPhase.notGameday and \
+           self.GAMEDAYPhase is not GamedayPhase.postGame:
+            self.scheduler.schedule(Event_dailyCheck,
+                                    self.dt + timedelta(minutes=dailyCheckRetryDelay),
+                                    self.dailyCheckEvent)
+            return
 
-            # At beginning of ceremony
-            self.whistle(wtwb_explanation)
+        if not self.dailyCheck(): # Check return value to see if should exit
+            self.scheduler.stop()
+            return
+
+        self.scheduler.schedule(Event_dailyCheck, self.getNextMidnightDateTime(), self.dailyCheckEvent)
+        self.scheduleNextWhistle()
+        self.scheduleDayEvents()
+
+    # Schedule any special events for today based on daily check
+    def scheduleDayEvents(self):
+        self.scheduler.cancel(Event_wtwbCeremony)
+        self.scheduler.cancel(Event_wtwbInMemoriam)
+        self.scheduler.cancel(Event_gameday)
+
+        if self.wtwbToday:
+            self.wtwbProcessing()
+        elif self.GAMEDAYPhase is not GamedayPhase.notGameday and self.footballConnected:
+            resume = self.GAMEDAYResume if self.GAMEDAYResume is not None else self.dt
+            self.GAMEDAYResume = None
+            self.scheduler.schedule(Event_gameday, resume, self.gamedayEvent)
+
+    def processDMsEvent(self):
+        self.updateDateTime()
+        # Check if any new DMs and respond to them appropriately
+        self.processDMs()
+
+        if self.reset:
+            self.scheduler.stop()
+            return
+
+        # Spread remaining rate limit budget evenly until it resets
+        pollInterval = self.rateLimits.getPollInterval(APIgetDMsPath, self.DMPollPeriod * secPerMin)
+        self.scheduler.schedule(Event_processDMs,
+                                self.dt + timedelta(seconds=pollInterval),
+                                self.processDMsEvent)
 
-            # Delay for approximate length of ceremony
-            sleep(self.wtwbTime[config_delay] * secPerMin)
+    # Edits to config or schedule take effect within a check period, not at midnight
+    def configWatchEvent(self):
+        self.updateDateTime()
+        self.reloadChangedFiles()
+        self.scheduler.schedule(Event_configWatch,
+                                self.dt + timedelta(minutes=self.configCheckPeriod),
+                                self.configWatchEvent)
 
-            # ...Before tweeting in memoriam
-            self.whistle(self.createValidRandomWhistleText(wtwb_inMemoriam))
+    # Kept off the whistle path, since local history is updated on every tweet
+    def reconcileTweetsEvent(self):
+        self.updateDateTime()
+        self.setPrevTweets()
+        self.scheduler.schedule(Event_reconcileTweets,
+                                self.dt + timedelta(hours=tweetReconcilePeriod),
+                                self.reconcileTweetsEvent)
 
+    def scheduleNextWhistle(self, after=None):
+        nextWhistle = self.scheduleIndex.getNextWhistleAfter(after if after is not None else self.dt)
+        if nextWhistle is not None:
+            self.scheduler.schedule(Event_scheduledWhistle, nextWhistle, self.scheduledProcessing)
+
+    def gamedayEvent(self):
+        self.updateDateTime()
+        nextTime = self.gamedayProcessing()
+        self.checkpointGameday()
+        if nextTime is not None:
+            self.scheduler.schedule(Event_gameday, nextTime, self.gamedayEvent)
+
+    # WTWB day silences the regular schedule, so only the ceremony is whistled
+    def wtwbProcessing(self):
+        ceremony = tz.localize(datetime(self.wtwbTime[config_year],
+                                        self.wtwbTime[config_month],
+                                        self.wtwbTime[config_day],
+                                        self.wtwbTime[config_hour],
+                                        self.wtwbTime[config_minute]))
         # Remain quiet after ceremony (or if booted during ceremony)
-        self.sleepUntil(self.getMidnight())
+        if self.dt < ceremony:
+            self.scheduler.schedule(Event_wtwbCeremony, ceremony, self.wtwbCeremonyEvent)
+
+    def wtwbCeremonyEvent(self):
+        self.updateDateTime()
+        # At beginning of ceremony
+        self.whistle(wtwb_explanation)
+
+        # Delay for approximate length of ceremony before tweeting in memoriam
+        self.scheduler.schedule(Event_wtwbInMemoriam,
+                                self.dt + timedelta(minutes=self.wtwbTime[config_delay]),
+                                self.wtwbInMemoriamEvent)
+
+    def wtwbInMemoriamEvent(self):
+        self.updateDateTime()
+        self.whistle(self.createValidRandomWhistleText(wtwb_inMemoriam))
 
     # "tweetRegularSchedule" is set at varous points during GAMEDAY
     # because games may occur during when scheduled whistles
     # should happen, but doing both is too convoluted and could
-    # miss the game. So only before and after the game (with
-    # assurances the device won't sleep through the game)
+    # miss the game. So only before and after the game
     # will regularly-scheduled whistles be enabled.
+    # Returns when this should next run, or None when done for the day.
     def gamedayProcessing(self):
         # Not GAMEDAY, so leave this method and do normal day
         if   self.GAMEDAYPhase is GamedayPhase.notGameday:
             self.tweetRegularSchedule = True
-            return
+            return None
         # Marching band tradition to celebrate GAMEDAY the second it arrives
         elif self.GAMEDAYPhase is GamedayPhase.midnightGameday:
             # TODO: If prevTweets have "#GAMEDAY" in them, skip.
             # Should reach this during midnight daily check
             self.whistle(gameday_midnight)
 
-            # Turn off scheduled tweets to make sure we reach next phase and don't sleep too long
-            self.tweetRegularSchedule = False
             # Move to next phase
             self.GAMEDAYPhase = GamedayPhase.earlyGameday
             logging.info("Leaving " + str(GamedayPhase.midnightGameday))
-            return
-        # Long before game, so allow scheduled whistles as long
-        # as the next whistle/event isn't during pregame
+            return self.dt
+        # Long before game, so allow scheduled whistles until pregame begins
         elif self.GAMEDAYPhase is GamedayPhase.earlyGameday:
-            # Get datetimes for next events
-            gameDate = datetime.strptime(self.GAMEDAYInfo[APIfield_DateTime], dtFormatFootballAPI)
-            nextWhistleTime = self.getNextScheduledWhistle()
-
-            # If next scheduled event is after pregame begins, move to next phase
-            if self.isFirstTimeBeforeSecond(gameDate.hour
-                                                - self.scheduleConfig[config_football][config_pregameHours],
-                                            gameDate.minute,
-                                            nextWhistleTime[config_hour],
-                                            nextWhistleTime[config_minute]):
-                # Turn off scheduled tweets for rest of game-related events
-                self.tweetRegularSchedule = False
-                # Sleep until pregame time
-                self.sleepUntil({
-                    config_hour: gameDate.hour
-                                    - self.scheduleConfig[config_football][config_pregameHours],
-                    config_minute: gameDate.minute
-                })
-                self.GAMEDAYPhase = GamedayPhase.preGame
-                logging.info("Leaving " + str(GamedayPhase.earlyGameday))
-            else:
-                # Leave on scheduled tweets since next one doesn't interfere with GAMEDAY
+            pregameDate = self.getPregameDateTime()
+            if self.dt < pregameDate:
+                # Leave on scheduled tweets since they don't interfere with GAMEDAY yet
                 self.tweetRegularSchedule = True
-            return
-        # Tweet before game for maximal school spirit, then sleep until game
+                return pregameDate
+
+            # Turn off scheduled tweets for rest of game-related events
+            self.tweetRegularSchedule = False
+            self.GAMEDAYPhase = GamedayPhase.preGame
+            logging.info("Leaving " + str(GamedayPhase.earlyGameday))
+            return self.dt
+        # Tweet before game for maximal school spirit, then wait until game
         elif self.GAMEDAYPhase is GamedayPhase.preGame:
             self.whistle(gameday_pregame)
-            gameDate = datetime.strptime(self.GAMEDAYInfo[APIfield_DateTime], dtFormatFootballAPI)
-            self.sleepUntil({
-                config_hour: gameDate.hour,
-                config_minute: gameDate.minute
-            })
 
             self.GAMEDAYPhase = GamedayPhase.toeHitLeather
             logging.info("Leaving " + str(GamedayPhase.preGame))
-            return
+            return self.getGameDateTime()
         # Tweet as game starts
         elif self.GAMEDAYPhase is GamedayPhase.toeHitLeather:
             self.whistle(gameday_toeHitLeather)
             # Set initial game state (should be 0-0, of course)
             self.gameState = Football.getGameState(self.GAMEDAYInfo[APIfield_GameID])
+            self.lastPoll = self.dt
 
             self.GAMEDAYPhase = GamedayPhase.gameOn
             logging.info("Leaving " + str(GamedayPhase.toeHitLeather))
-            return
-        # Check if score has changed, tweet if so, then sleep until next sampling
+            return self.getNextScorePollTime()
+        # Check if score has changed, tweet if so, then wait until next sampling
         elif self.GAMEDAYPhase is GamedayPhase.gameOn:
             # TODO: Needs testing
             # If offline, escape this loop after game is surely over
-            gameDate = datetime.strptime(self.GAMEDAYInfo[APIfield_DateTime], dtFormatFootballAPI)
-            if abs(self.dt.hour - gameDate.hour) > gamedayMaxHours:
+            if self.dt - self.getGameDateTime() > timedelta(hours=gamedayMaxHours):
                 self.GAMEDAYPhase = GamedayPhase.postGame
+                return self.dt
 
             # Hang on to previous state for comparison
             oldGameState = self.gameState
             # Get new score and progress through game
             # Note: scores are scrabled +/- 20%, but they should change during TD/FGs/Safeties
             self.gameState = Football.getGameState(self.GAMEDAYInfo[APIfield_GameID])
+            self.lastPoll = self.dt
 
             if Football.ourTeamScored(
                     APIdata_GTTeam,
@@ -438,11 +715,10 @@ class Whistler:
                 ))
                 # In case of a score at the same time the game ends,
                 # do one at a time. Don't want to whistle back-to-back
-                sleep(scoreSamplingPeriod * secPerMin)
-                return
+                return self.getNextScorePollTime()
 
             # If game is newly over
-            if self.gameState[APIfield_Period] == APIdata_Final:
+            if self.gameState is not None and self.gameState[APIfield_Period] == APIdata_Final:
                 # Tweet as game ends if victory
                 if Football.ourTeamWinning(APIdata_GTTeam, self.gameState):
                     self.whistle(gameday_victory + self.generateFootballWhistleText(
@@ -452,105 +728,59 @@ class Whistler:
 
                 self.GAMEDAYPhase = GamedayPhase.postGame
                 logging.info("Leaving " + str(GamedayPhase.gameOn))
-            # Sleep until next time to sample
-            else:
-                sleep(scoreSamplingPeriod * secPerMin)
-            return
+                return self.dt
+            # Wait until next time to sample, keeping previous state if sample failed
+            if self.gameState is None:
+                self.gameState = oldGameState
+            return self.getNextScorePollTime()
         # Return to normal scheduled operation
         # (Unlikely to have more to whistle today, anyway)
         elif self.GAMEDAYPhase is GamedayPhase.postGame:
+            # Kept as finished, so a restart later today doesn't follow game again
+            self.checkpointGameday()
             self.GAMEDAYInfo = None
+            self.GAMEDAYKickoff = None
             self.gameState = None
+            self.lastPoll = None
             self.tweetRegularSchedule = True
             logging.info("Leaving " + str(GamedayPhase.postGame))
-            return
+            return None
         else:
             self.whistlerError("Unknown GAMEDAY phase error!")
-        return
+        return None
 
     # Regular whistle schedule check
+    # Checked against the event's deadline rather than when it ran, so a whistle
+    # delayed past its minute by earlier events is still made (the outbox decides
+    # if it's too late), and the next one is found from there
     def scheduledProcessing(self):
-        curTime = {config_hour: self.dt.hour, config_minute: self.dt.minute}
-        # If scheduled whistle time and haven't just whistled
-        if self.scheduleWhistled is False and curTime in self.dailySchedule:
+        self.updateDateTime()
+        target = self.getWhistleTarget()
+        # Under some conditions (WTWB, GAMEDAY), any regularly-scheduled tweets will be ignored
+        if self.tweetRegularSchedule and not self.wtwbToday and \
+           self.scheduleIndex.isWhistleTime(target):
             self.scheduledWhistle()
-        # If not, sleep until next useful time
-        else:
-            self.scheduleWhistled = False
-            self.sleepUntil(self.getNextScheduledWhistle())
+
+        self.scheduleNextWhistle(target)
 
     # ----------------------
     # --- STRING METHODS ---
     # ----------------------
 
     @staticmethod
-    def generateRandomWhistleText():
-        # Calculate randomized numbers of letters
-        numSs     = randint(SsDefault     - SsDelta,
-                            SsDefault     + SsDelta)
-        numHs     = randint(HsDefault     - HsDelta,
-                            HsDefault     + HsDelta)
-        numLowEs  = randint(LowEsDefault  - LowEsDelta,
-                            LowEsDefault  + LowEsDelta)
-        numHighEs = randint(HighEsDefault - HighEsDelta,
-                            HighEsDefault + HighEsDelta)
-        numHighOs = randint(HighOsDefault - HighOsDelta,
-                            HighOsDefault + HighOsDelta)
-        numLowOs  = randint(LowOsDefault  - LowOsDelta,
-                            LowOsDefault  + LowOsDelta)
-
-        # Fill out text
-        text = ""
-        for index in range(numSs):
-            text += "s"
-        for index in range(numHs):
-            text += "h"
-        text += "vr"
-        for index in range(numLowEs):
-            text += "e"
-        for index in range(numHighEs):
-            text += "E"
-        for index in range(numHighOs):
-            text += "O"
-        for index in range(numLowOs):
-            text += "o"
-        text += "w"
-        
-        # Stand up for what you believe in
-        cause = random()
-        if cause > 0.95:
-            text += " (#BlackLivesMatter)"
-        elif cause > 0.9:
-            text += " (#StopAsianHate)"
-        elif cause < 0.1:
-            text += " (#GetVaccinated)"
-
-        return text
-
-    @staticmethod
+    @lru_cache(maxsize=footballTextCacheSize)
     def generateFootballWhistleText(score, oppTeam):
         # Fill out text
-        text = ""
-        for index in range(SsDefault):
-            text += "s"
-        for index in range(HsDefault):
-            text += "h"
-        text += "vr"
-        for index in range(LowEsDefault):
-            text += "e"
-        for index in range(score if score > HighEsDefault else HighEsDefault):
-            text += "E"
+        text = "s" * SsDefault + "h" * HsDefault + "vr" + "e" * LowEsDefault + \
+               "E" * (score if score > HighEsDefault else HighEsDefault)
 
         # Yes, I completely lack maturity
         if oppTeam == APIdata_ugaTeam:
             text += "O" + thwg + "O"
         else:
-            for index in range(HighOsDefault):
-                text += "O"
+            text += "O" * HighOsDefault
 
-        for index in range(LowOsDefault):
-            text += "o"
-        text += "w"
+        text += "o" * LowOsDefault + "w"
 
         return text
 
@@ -569,10 +799,9 @@ class Whistler:
 
         # Compare text against past tweets to avoid duplicates
         # (which will not be tweeted as per Twitter rules)
-        for tweet in self.prevTweets:
-            if tweet[APIfield_TweetText] == text:
-                logging.warning("Warning: attempted to tweet duplicate: " + text)
-                return False
+        if self.tweetHistory.contains(text):
+            logging.warning("Warning: attempted to tweet duplicate: " + text)
+            return False
 
         return True
 
@@ -584,16 +813,14 @@ class Whistler:
             return True
 
     def createValidRandomWhistleText(self, prefixString=""):
-        self.setPrevTweets()
-
-        potentialText = ""
-        validTextFound = False
-
-        while not validTextFound:
+        # Texts don't repeat until all are used, so this only retries
+        # if history holds tweets from before the generator's cycle
+        for attempt in range(maxTextAttempts):
             # Generate tweet text
-            potentialText = prefixString + self.generateRandomWhistleText()
+            potentialText = prefixString + self.whistleText.nextText()
             # Check if text is new
-            validTextFound = self.isWhistleTextValid(potentialText)
+            if self.isWhistleTextValid(potentialText):
+                return potentialText
 
         return potentialText
 
@@ -604,46 +831,87 @@ class Whistler:
     def processDMs(self):
         for DM in self.getNewDMs():
             self.interpretDM(DM)
-            # Prevent sending tons of DMs in a burst
-            sleep(DM_delay)
+            # Recorded once handled, so a restart never acts on the same DM twice
+            Utils.storeProcessedDM(DM[DM_ID], DM[DM_timestamp])
+            # Don't hold up a reset behind other messages
+            # (Any left unhandled are fetched again next time)
+            if self.reset:
+                self.scheduler.stop()
+                return
+        if self.newestDMTimestamp > Utils.readLatestDMTimestamp():
+            Utils.storeLatestDMTimestamp(self.newestDMTimestamp)
 
+    # Follows pages back from newest DM until reaching the last one already read,
+    # so each poll costs only as much as there are new messages
     def getNewDMs(self):
-        directMessages = []
-
-        try:
-            # Gets last 30 days of DMs
-            r = self.t.request(APIgetDMsPath)
-            if r.status_code == 200:
-                directMessages = json.loads(r.text)[DM_events]
-                if len(directMessages) == 0:
-                    return []
-            else:
-                self.whistlerError("Could not connect to read DMs!")
-                return []
-        except Exception as e:
-            self.whistlerError("Failure when reading DMs: " + str(e))
-            return []
-
         latestTimestamp = Utils.readLatestDMTimestamp()
+        self.newestDMTimestamp = latestTimestamp
+        outputDMList = []
+        cursor = None
 
-        # Set latest read DM timestamp to first in list
-        # (most recent) if not same as existing
-        # Only do this for future use. Old "latest" must
-        # still be used for this call to know when to stop
-        if int(directMessages[0][DM_timestamp]) > latestTimestamp:
-            Utils.storeLatestDMTimestamp(int(directMessages[0][DM_timestamp]))
+        if not self.canCallTwitter(APIgetDMsPath) or not self.breakers[Breaker_DMs].allow():
+            return []
 
-        # Return only newer DMs than last read one that were sent to the bot
-        # NOTE: Will miss DMs if more than 20 received since last check
-        outputDMList = []
-        for DM in directMessages:
-            if int(DM[DM_timestamp]) <= latestTimestamp:
-                return outputDMList
-            elif int(DM[DM_messageCreate][DM_target][DM_recipientID]) == self.APIConfig[config_botUserID]:
-                outputDMList.append(DM)
+        for page in range(DM_maxPages):
+            params = { DM_count: DM_pageSize }
+            if cursor is not None:
+                params[DM_cursor] = cursor
+                # Rest are read next time if budget runs low partway
+                if not self.canCallTwitter(APIgetDMsPath):
+                    self.newestDMTimestamp = latestTimestamp
+                    break
+
+            # If a page fails, high-water mark stays put so missed DMs are read next time
+            try:
+                r = self.twitterRequest(APIgetDMsPath, params)
+                self.recordResponse(Breaker_DMs, r.status_code)
+                if r.status_code == 200:
+                    response = json.loads(r.text)
+                else:
+                    self.whistlerError("Could not connect to read DMs!")
+                    self.newestDMTimestamp = latestTimestamp
+                    break
+            except Exception as e:
+                self.whistlerError("Failure when reading DMs: " + str(e), Breaker_DMs)
+                self.newestDMTimestamp = latestTimestamp
+                break
+
+            reachedLatest = False
+            for DM in response.get(DM_events, []):
+                timestamp = int(DM[DM_timestamp])
+                if timestamp <= latestTimestamp:
+                    reachedLatest = True
+                    break
+                self.newestDMTimestamp = max(self.newestDMTimestamp, timestamp)
+                # Only those sent to the bot and not already handled
+                if int(DM[DM_messageCreate][DM_target][DM_recipientID]) == self.APIConfig[config_botUserID] and \
+                   not Utils.isDMProcessed(DM[DM_ID]):
+                    outputDMList.append(DM)
+
+            cursor = response.get(DM_nextCursor)
+            if reachedLatest or cursor is None:
+                break
+        else:
+            logging.warning("Stopped reading DMs after " + str(DM_maxPages) + " pages; rest next time")
+            self.newestDMTimestamp = latestTimestamp
 
+        # Oldest first, in order they were sent
+        outputDMList.reverse()
         return outputDMList
 
+    # Most recent local time matching "HH:MM" (today, or yesterday if not reached yet)
+    def parseLogSinceTime(self, timeStr):
+        try:
+            parsed = datetime.strptime(timeStr, "%H:%M")
+        except ValueError as e:
+            logging.warning("Failure to convert log start time argument: " + str(e))
+            return None
+        now = self.clock.now()
+        startDT = tz.localize(datetime.combine(now.date(), parsed.time()))
+        if startDT > now:
+            startDT = tz.localize(datetime.combine(now.date() - timedelta(days=1), parsed.time()))
+        return startDT
+
     # TODO: Logging fails on emoji
     def interpretDM(self, DM):
         msg = DM[DM_messageCreate][DM_messageData][DM_text]
@@ -657,7 +925,18 @@ class Whistler:
         elif DM_printLog in msg.lower() and int(DM[DM_messageCreate][DM_senderID]) == self.APIConfig[config_ownerUserID]:
             logging.info("Attempting to print log...")
             strArr = msg.lower().split()
-            if strArr[0] == DM_printLog and len(strArr) == 2:
+            if strArr[0] == DM_printLog and len(strArr) == 3 and strArr[1] == DM_logSince:
+                startDT = self.parseLogSinceTime(strArr[2])
+                if startDT is None:
+                    self.sendDM("Print log command format: 'log since [HH:MM]'")
+                else:
+                    self.sendDM(Utils.getLogRange(startDT) or "No log lines since " + strArr[2])
+            elif strArr[0] == DM_printLog and len(strArr) == 2 and strArr[1] == DM_logGameday:
+                if self.GAMEDAYLogStart is None:
+                    self.sendDM("No GAMEDAY since starting up")
+                else:
+                    self.sendDM(Utils.getLogRange(self.GAMEDAYLogStart) or "No log lines since GAMEDAY began")
+            elif strArr[0] == DM_printLog and len(strArr) == 2:
                 try:
                     numLines = int(strArr[1])
                 except Exception as e:
@@ -690,6 +969,7 @@ class Whistler:
     # --- OUTPUT METHODS ---
     # ----------------------
 
+    # Queued, so sending (and pacing between sends) doesn't hold up the bot
     def sendDM(self, message, userID=0):
         if not self.isWhistleDMTextValid(message):
             return
@@ -698,8 +978,16 @@ class Whistler:
         if userID == 0:
             userID = self.APIConfig[config_ownerUserID]
 
+        self.dmQueue.enqueue(userID, message)
+
+    # Called from DM queue with messages to same person already joined
+    def postDM(self, userID, message):
         try:
             if not debugDoNotDM:
+                if not self.canCallTwitter(APIpostDMPath) or \
+                   not self.breakers[Breaker_DMs].allow():
+                    logging.error("DM not sent: " + message[:DM_maxLogChars])
+                    return
                 payload = {
                     DM_event: {
                         DM_type: DM_messageCreate,
@@ -714,7 +1002,8 @@ class Whistler:
                     }
                 }
                 # TODO: Why does this require json.dumps()?
-                r = self.t.request(APIpostDMPath, json.dumps(payload))
+                r = self.twitterRequest(APIpostDMPath, json.dumps(payload))
+                self.recordResponse(Breaker_DMs, r.status_code)
 
                 if r.status_code != 200:
                     # Don't try to send another DM when it just failed
@@ -728,45 +1017,115 @@ class Whistler:
         except Exception as e:
             # Don't try to send another DM when it just failed
             logging.error("Failure when DMing: " + str(e))
+            self.breakers[Breaker_DMs].recordFailure()
 
     def whistleTweet(self, text):
-        # Done in createValidRandomWhistleText, but not every whistle calls
-        # that method. Check if None and call if so.
-        if self.prevTweets is None:
-            self.setPrevTweets()
-
-        if self.prevTweets is None:
-            self.whistlerError("Not tweeting!")
-            return
-
         # Confirm it has been at least a small amount of time since the last tweet
         # Could be necessary if program started and stopped very quickly
         # Use to be optional, but now only set to 1 minute, which is within
         # GAMEDAY sampling rate for scores
-        lastTweetTime = datetime.strptime(self.prevTweets[0][APIfield_TweetTimestamp],
-                                          dtFormatTwitter) \
-                                           .astimezone(tz)
-
-        secSinceLastTweet = (self.dt - lastTweetTime).seconds
-        if 0 <= secSinceLastTweet <= minTweetTimeDelta * secPerMin:
-            sleep((minTweetTimeDelta * secPerMin) - secSinceLastTweet)
-            return
+        # (Local history is kept on every tweet, so no timeline fetch needed.
+        # If history is empty this is the first tweet we know of.)
+        # Too soon after it, the whistle is held in outbox until the gap has passed
+        gapWait = self.getTweetGapWait(self.dt)
+        notBefore = self.dt + timedelta(seconds=gapWait) if gapWait > 0 else None
+
+        # Journaled first, so it's retried if posting fails and not lost if bot stops
+        self.tweetOutbox.add(text, self.getWhistleTarget(), notBefore)
+        self.sendOutbox()
+
+    # When the whistle being made was due: the running event's deadline, or now
+    def getWhistleTarget(self):
+        deadline = self.scheduler.currentDeadline
+        return deadline if deadline is not None else self.dt
+
+    # Seconds until "minTweetTimeDelta" has passed since the last tweet (0 if it has)
+    def getTweetGapWait(self, now):
+        lastTweetTime = self.tweetHistory.getLatestDateTime()
+        if lastTweetTime is None:
+            return 0.0
+        secSinceLastTweet = (now - lastTweetTime).total_seconds()
+        if 0 <= secSinceLastTweet < minTweetTimeDelta * secPerMin:
+            return minTweetTimeDelta * secPerMin - secSinceLastTweet
+        return 0.0
+
+    # Posts any due tweets from outbox, then schedules itself for the next retry
+    def sendOutbox(self):
+        now = self.clock.now()
+        retryWait = self.breakers[Breaker_twitterPost].getRemainingDelay()
+        for entry in self.tweetOutbox.getPending():
+            text = entry[Outbox_text]
+            if self.tweetOutbox.isTooLate(entry, now):
+                logging.warning("Giving up on tweet for " +
+                                self.tweetOutbox.getTargetDateTime(entry).strftime(dtFormat) + ": " + text)
+                self.tweetOutbox.markAbandoned(entry)
+                continue
+            if not self.tweetOutbox.isDue(entry, now):
+                continue
+            # Tried before a restart, and timeline shows it went up
+            if entry[Outbox_attempts] > 0 and self.tweetHistory.contains(text):
+                self.tweetOutbox.markPosted(entry)
+                continue
+            # Several due at once still go out a gap apart
+            gapWait = self.getTweetGapWait(now)
+            if gapWait > 0:
+                retryWait = max(retryWait, gapWait)
+                break
+            # Due entries are left as they are, so wait before trying again rather
+            # than rescheduling at their deadline, which has already passed
+            if not self.canCallTwitter(APIpostTweetPath, critical=True):
+                retryWait = max(retryWait, outboxBaseDelay, self.rateLimits.getResetWait(APIpostTweetPath))
+                break
+            if not self.breakers[Breaker_twitterPost].allow():
+                retryWait = max(retryWait, outboxBaseDelay, self.breakers[Breaker_twitterPost].getRemainingDelay())
+                break
+            self.postOutboxTweet(entry, now)
+
+        nextAttempt = self.tweetOutbox.getNextAttemptDateTime()
+        if nextAttempt is None:
+            self.scheduler.cancel(Event_tweetOutbox)
+        else:
+            nextAttempt = max(nextAttempt, now + timedelta(seconds=retryWait))
+            self.scheduler.schedule(Event_tweetOutbox, nextAttempt, self.tweetOutboxEvent)
 
-        # Otherwise, tweet!
+    def postOutboxTweet(self, entry, now):
+        text = entry[Outbox_text]
+        self.tweetOutbox.startAttempt(entry, now)
         try:
             payload = {Tweet_status: text}
-            r = self.t.request(APIpostTweetPath, payload)
+            r = self.twitterRequest(APIpostTweetPath, payload)
+            isDuplicate = r.status_code == 403 and str(Tweet_duplicateError) in r.text
+            if isDuplicate:
+                self.breakers[Breaker_twitterPost].recordSuccess() # Service is up; it's the tweet
+            else:
+                self.recordResponse(Breaker_twitterPost, r.status_code)
 
-            if r.status_code != 200:
-                self.whistlerError("Could not connect to send tweet!")
+            # Twitter refuses a repeat, so a retry after a post that did go up lands here
+            if isDuplicate:
+                if entry[Outbox_attempts] > 1:
+                    logging.info("Tweet already posted on earlier attempt: " + text)
+                else:
+                    self.tweetOutbox.markAbandoned(entry)
+                    self.whistlerError("Twitter refused duplicate tweet: " + text)
+                    return
+            elif r.status_code != 200:
+                self.whistlerError("Could not connect to send tweet! (attempt " +
+                                   str(entry[Outbox_attempts]) + ")")
+                return
         except Exception as e:
             errorStr = "Error when tweeting: " + text + " (" + str(e) + ")"
-            self.whistlerError(errorStr)
-        else:
-            printStr = "Whistled: {0} @ {1}".format(text, self.dt.strftime(dtFormat))
-            logging.info(printStr)
+            self.whistlerError(errorStr, Breaker_twitterPost)
+            return
 
-            self.scheduleWhistled = True
+        printStr = "Whistled: {0} @ {1}".format(text, now.strftime(dtFormat))
+        logging.info(printStr)
+
+        self.tweetOutbox.markPosted(entry)
+        self.tweetHistory.add(text, now)
+
+    def tweetOutboxEvent(self):
+        self.updateDateTime()
+        self.sendOutbox()
 
     # Method primarily for debugging
     # Note that this does not follow the restriction of only one message per 5 minutes
@@ -776,8 +1135,6 @@ class Whistler:
         stdout.flush()
         logging.info(printStr)
 
-        self.scheduleWhistled = True
-
     # Allows both methods of output for deployment and testing
     def whistle(self, text):
         if debugDoNotTweet:
@@ -785,83 +1142,69 @@ class Whistler:
         else:
             self.whistleTweet(text)
 
+    # Each scheduled minute gets its own event, and "whistleTweet" spaces it
+    # from any other recent tweet, so there's no need to check for one here
     def scheduledWhistle(self):
-        # Only tweet if not recently whistled
-        if not self.scheduleWhistled:
-            self.whistle(self.createValidRandomWhistleText())
+        self.whistle(self.createValidRandomWhistleText())
 
+    # Reconciles local tweet history with timeline. Whistling carries on with
+    # local history if this fails, so failures are only logged.
     def setPrevTweets(self):
+        # Local history carries on without this, so just skip while timeline is failing
+        if not self.canCallTwitter(APIgetTweetsPath) or not self.breakers[Breaker_twitterRead].allow():
+            return
+
         # Get previous tweets for later comparisons of time and text
         try:
             payload = {
                 Tweet_userID: self.APIConfig[config_botUserID],
                 Tweet_count: numTweetsCompare
             }
-            r = self.t.request(APIgetTweetsPath, payload)
+            r = self.twitterRequest(APIgetTweetsPath, payload)
+            self.recordResponse(Breaker_twitterRead, r.status_code)
 
             if r.status_code == 200:
                 pT = json.loads(r.text)
                 if len(pT) > 0:
-                    self.prevTweets = json.loads(r.text)
+                    self.tweetHistory.reconcile(pT)
                 else:
-                    self.whistlerError("Did not retrieve previous tweets!")
+                    logging.error("Did not retrieve previous tweets!")
                     return
             else:
-                self.whistlerError("Could not connect to get previous tweets!")
+                logging.error("Could not connect to get previous tweets!")
                 return
 
         except Exception as e:
             errorStr = "Error when getting previous tweets: (" + str(e) + ")"
-            self.whistlerError(errorStr)
+            logging.error(errorStr)
+            self.breakers[Breaker_twitterRead].recordFailure()
 
     # ----------------------------
     # --- MAIN PROCESSING LOOP ---
     # ----------------------------
 
     def start(self):
+        self.dmQueue.start()
         self.sendDM("[{0}] Wetting whistle... @ {1}"
                     .format(versionNumber,
-                        datetime.now(tz).strftime(dtFormat)))
+                        self.clock.now().strftime(dtFormat)))
 
         try:
-            while not self.reset:
-                # Get current date and time (where the whistle is)
-                self.dt = datetime.now(tz)
-                
-                # If first check of a new day, run daily check
-                # Also ensure that a football game isn't currently still going from earlier in the evening
-                if not self.reset and self.curDay is not self.dt.weekday() and \
-                    (self.GAMEDAYPhase is GamedayPhase.notGameday or
-                     self.GAMEDAYPhase is GamedayPhase.postGame):
-                    if not self.dailyCheck(): # Check return value to see if should exit
-                        return
-
-                # Check if any new DMs and respond to them appropriately
-                if not self.reset:
-                    self.processDMs()
-
-                # If When The Whistle Blows day
-                if not self.reset:
-                    if self.wtwbToday:
-                        self.wtwbProcessing()
-                        continue # Skip remaining processing
-                    # If football game today
-                    elif self.GAMEDAYPhase is not GamedayPhase.notGameday and self.footballConnected:
-                        self.gamedayProcessing()
-
-                # Under some conditions (GAMEDAY), any regularly-scheduled tweets will be ignored
-                if self.tweetRegularSchedule and not self.reset:
-                    # If schedule whistle time, whistle
-                    # If not, sleep until next useful time
-                    self.scheduledProcessing()
-
+            self.startEvents()
+            # Wake for each event's deadline until reset or failed daily check
+            self.scheduler.run()
         except Exception as e:
             errorStr = "Error during loop: " + str(e)
             self.whistlerError(errorStr)
+            self.pauseBeforeExit()
+        finally:
+            # Send whatever is still queued before exiting
+            self.dmQueue.stop()
 
 # -----------------
 # --- EXECUTION ---
 # -----------------
 
-GTWhistle = Whistler()
-GTWhistle.start()
+if __name__ == "__main__":
+    GTWhistle = Whistler()
+    GTWhistle.start()
@@ -0,0 +1,280 @@
+# LogStore.py holds the logging backend. Logs are written in segments that
+# rotate by size or date, optionally as structured JSON lines, with a small
+# sidecar index from time to segment and byte offset. Range queries (such as
+# the "log since 14:00" DM) use the index to read only the bytes they need.
+
+import json
+import logging
+import os
+from bisect import bisect_right
+from datetime import datetime
+
+from Constants import *
+
+# Formatting of each record in plain text segments
+logTextFormat     = '%(asctime)s: %(message)s'
+logTextTimeFormat = "%Y-%m-%d %H:%M:%S,%f"
+logTextTimeLength = 23 # Characters of "asctime" at start of each line
+
+class JSONLineFormatter(logging.Formatter):
+    """Class that formats each record as one line of JSON"""
+
+    def format(self, record):
+        return json.dumps({
+            LogField_time:    record.created,
+            LogField_level:   record.levelname,
+            LogField_message: record.getMessage()
+        })
+
+class IndexedRotatingHandler(logging.Handler):
+    """Class that writes log segments, rotating them by size or date,
+    and keeps an index of where in which segment each time starts"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    fileName     = None # Active segment; archived ones get start time in their name
+    indexName    = None
+    structured   = False
+    stream       = None
+    segmentStart = None # Date/time active segment began, in same local time as "asctime"
+    index        = None # Entries of [time, segment, offset], in time order
+    lastIndexed  = 0
+
+    def __init__(self, fileName=logFile, structured=logStructured):
+        logging.Handler.__init__(self)
+        self.fileName = fileName
+        self.indexName = fileName + logIndexSuffix
+        self.structured = structured
+        self.setFormatter(JSONLineFormatter() if structured else logging.Formatter(logTextFormat))
+
+        self.index = readIndex(self.indexName)
+        if len(self.index) > 0:
+            self.lastIndexed = self.index[-1][0]
+        self.openSegment()
+
+    def openSegment(self):
+        self.stream = open(self.fileName, 'a', encoding='utf-8')
+        startTime = self.getSegmentStartTime()
+        self.segmentStart = datetime.fromtimestamp(startTime)
+
+    # Earliest index entry for active segment, or when file was created
+    def getSegmentStartTime(self):
+        for entryTime, segment, offset in self.index:
+            if segment == self.fileName:
+                return entryTime
+        if self.stream.tell() > 0:
+            return os.path.getmtime(self.fileName)
+        return datetime.now().timestamp()
+
+    def shouldRotate(self, recordTime):
+        if self.stream.tell() >= logMaxSegmentBytes:
+            return True
+        if logRotateDaily and self.stream.tell() > 0 and \
+           datetime.fromtimestamp(recordTime).date() != self.segmentStart.date():
+            return True
+        return False
+
+    def getArchiveName(self):
+        base, extension = os.path.splitext(self.fileName)
+        archiveName = base + "." + self.segmentStart.strftime(logArchiveTimeFormat)
+        # Segments filling within the same second still need distinct names
+        suffix = 1
+        while os.path.exists(archiveName + extension):
+            archiveName = base + "." + self.segmentStart.strftime(logArchiveTimeFormat) + "-" + str(suffix)
+            suffix += 1
+        return archiveName + extension
+
+    def rotate(self):
+        self.stream.close()
+        archiveName = self.getArchiveName()
+        os.replace(self.fileName, archiveName)
+
+        # Index entries follow the segment to its new name
+        for entry in self.index:
+            if entry[1] == self.fileName:
+                entry[1] = archiveName
+
+        self.removeOldSegments()
+        writeIndex(self.indexName, self.index)
+        self.stream = open(self.fileName, 'a', encoding='utf-8')
+
+    def removeOldSegments(self):
+        archives = listArchivedSegments(self.fileName)
+        expired = archives[:max(len(archives) - (logMaxSegments - 1), 0)]
+        for segment in expired:
+            try:
+                os.remove(segment)
+            except OSError:
+                pass
+        if len(expired) > 0:
+            self.index = [entry for entry in self.index if entry[1] not in expired]
+
+    def emit(self, record):
+        try:
+            if self.shouldRotate(record.created):
+                self.rotate()
+                self.segmentStart = datetime.fromtimestamp(record.created)
+
+            # Index is sparse: one entry per interval is enough to seek near any time
+            if record.created - self.lastIndexed >= logIndexInterval or \
+               self.stream.tell() == 0:
+                entry = [record.created, self.fileName, self.stream.tell()]
+                self.index.append(entry)
+                appendIndex(self.indexName, entry)
+                self.lastIndexed = record.created
+
+            self.stream.write(self.format(record) + "\n")
+            self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+        finally:
+            self.release()
+        logging.Handler.close(self)
+
+# ---------------------
+# --- INDEX METHODS ---
+# ---------------------
+
+def readIndex(indexName):
+    index = []
+    try:
+        with open(indexName, 'r') as inFile:
+            for line in inFile:
+                try:
+                    index.append(json.loads(line))
+                except ValueError:
+                    pass # Partial line from a crash while writing
+    except FileNotFoundError:
+        pass
+    # Drop entries for segments that no longer exist
+    return [entry for entry in index if os.path.exists(entry[1])]
+
+def appendIndex(indexName, entry):
+    with open(indexName, 'a') as outFile:
+        outFile.write(json.dumps(entry) + "\n")
+
+def writeIndex(indexName, index):
+    tempName = indexName + ".tmp"
+    with open(tempName, 'w') as outFile:
+        for entry in index:
+            outFile.write(json.dumps(entry) + "\n")
+    os.replace(tempName, indexName)
+
+# Oldest first, since archive names hold their start time
+# (Sorted by parsed name, as "-1" sorts before "." for a same-second collision)
+def listArchivedSegments(fileName=logFile):
+    directory = os.path.dirname(fileName) or "."
+    base, extension = os.path.splitext(os.path.basename(fileName))
+    archives = [name for name in os.listdir(directory)
+                if name.startswith(base + ".") and name.endswith(extension) and
+                   name != os.path.basename(fileName) and
+                   not name.endswith(logIndexSuffix)]
+    archives.sort(key=lambda name: getArchiveSortKey(name[len(base) + 1:len(name) - len(extension)]))
+    return [os.path.join(os.path.dirname(fileName), name) for name in archives]
+
+# (start time, collision number) from the middle of an archive's name
+def getArchiveSortKey(stamp):
+    stampLength = len(datetime(2000, 1, 1).strftime(logArchiveTimeFormat))
+    suffix = stamp[stampLength + 1:]
+    return stamp[:stampLength], int(suffix) if suffix.isdigit() else 0
+
+# --------------------
+# --- READ METHODS ---
+# --------------------
+
+# Reads blocks backward from end of file until enough lines are found
+# (If file has fewer lines, returns all it has)
+def readLastLines(fileName, numLines):
+    if numLines <= 0:
+        return []
+
+    with open(fileName, 'rb') as inFile:
+        inFile.seek(0, os.SEEK_END)
+        position = inFile.tell()
+        blocks = []
+        numNewlines = 0
+
+        # One more newline than lines wanted, so first line kept is whole
+        while position > 0 and numNewlines <= numLines:
+            readSize = min(logReadBlockSize, position)
+            position -= readSize
+            inFile.seek(position)
+            block = inFile.read(readSize)
+            blocks.append(block)
+            numNewlines += block.count(b"\n")
+
+    blocks.reverse()
+    lines = b"".join(blocks).splitlines(keepends=True)
+    return [line.decode('utf-8', errors='replace') for line in lines[-numLines:]]
+
+# Last lines of log, continuing into archived segments if active one is short
+def tailLines(numLines, fileName=logFile):
+    lines = readLastLines(fileName, numLines)
+    for segment in reversed(listArchivedSegments(fileName)):
+        if len(lines) >= numLines:
+            break
+        lines = readLastLines(segment, numLines - len(lines)) + lines
+    return lines
+
+# Time of a log line as epoch seconds, or None for continuation lines
+def getLineTime(line):
+    try:
+        if line.startswith("{"):
+            return json.loads(line)[LogField_time]
+        # "asctime" is in machine's local time, as is a naive datetime
+        return datetime.strptime(line[:logTextTimeLength], logTextTimeFormat).timestamp()
+    except (ValueError, KeyError, TypeError):
+        return None
+
+# Lines logged in range [startDT, endDT), up to maxLines, reading forward from
+# the index entry just before startDT rather than scanning everything
+def readRange(startDT, endDT=None, maxLines=DM_maxNumLines, fileName=logFile):
+    startTime = startDT.timestamp()
+    endTime = endDT.timestamp() if endDT is not None else None
+
+    index = readIndex(fileName + logIndexSuffix)
+    entryTimes = [entry[0] for entry in index]
+    position = bisect_right(entryTimes, startTime) - 1
+
+    if position >= 0:
+        segment, offset = index[position][1], index[position][2]
+    elif len(index) > 0:
+        segment, offset = index[0][1], index[0][2]
+    else:
+        segment, offset = fileName, 0 # No index, so scan active segment
+
+    # Segments from the one found onward, oldest first
+    segments = listArchivedSegments(fileName) + [fileName]
+    if segment in segments:
+        segments = segments[segments.index(segment):]
+
+    lines = []
+    inRange = False
+    for segment in segments:
+        try:
+            with open(segment, 'rb') as inFile:
+                inFile.seek(offset)
+                for rawLine in inFile:
+                    line = rawLine.decode('utf-8', errors='replace')
+                    lineTime = getLineTime(line)
+                    if lineTime is not None:
+                        if endTime is not None and lineTime >= endTime:
+                            return lines
+                        inRange = lineTime >= startTime
+                    if inRange:
+                        lines.append(line)
+                        if len(lines) >= maxLines:
+                            return lines
+        except FileNotFoundError:
+            pass
+        offset = 0
+    return lines
@@ -0,0 +1,88 @@
+# RateLimits.py tracks Twitter's rate limit headers for each endpoint, so
+# polling can spread the remaining budget evenly over the window and
+# less important calls can step aside before whistles get throttled.
+
+import threading
+
+from Constants import *
+
+class RateLimitTracker:
+    """Class that remembers the latest rate limit headers for each
+    Twitter endpoint and decides whether calls can afford to be made"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    clock  = None
+    lock   = None
+    limits = None # Endpoint path -> { limit, remaining, reset (epoch seconds) }
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.limits = {}
+
+    # Header names are case-insensitive, and not every response has them
+    def update(self, path, headers):
+        if headers is None:
+            return
+        values = { name.lower(): value for name, value in headers.items() }
+        try:
+            limit = {
+                RateLimit_limit:     int(values[RateLimit_limit]),
+                RateLimit_remaining: int(values[RateLimit_remaining]),
+                RateLimit_reset:     int(values[RateLimit_reset])
+            }
+        except (KeyError, ValueError):
+            return
+        with self.lock:
+            self.limits[path] = limit
+        if limit[RateLimit_remaining] <= rateLimitReserve:
+            logging.warning("Twitter rate limit for " + path + " nearly used: " +
+                            str(limit[RateLimit_remaining]) + " of " + str(limit[RateLimit_limit]) + " left")
+
+    # Latest known limit for path, or None if unknown or its window has reset
+    def getLimit(self, path):
+        with self.lock:
+            limit = self.limits.get(path)
+        if limit is None or self.clock.timestamp() >= limit[RateLimit_reset]:
+            return None
+        return limit
+
+    # Seconds until path's window resets (0 if unknown)
+    def getResetWait(self, path):
+        limit = self.getLimit(path)
+        if limit is None:
+            return 0.0
+        return max(0.0, limit[RateLimit_reset] - self.clock.timestamp())
+
+    def getRemaining(self, path):
+        limit = self.getLimit(path)
+        return limit[RateLimit_remaining] if limit is not None else None
+
+    # Whistle posts get through while any budget is left. Other calls leave a
+    # reserve on their own endpoint, and stand aside entirely while posting is low.
+    def allow(self, path, critical=False):
+        remaining = self.getRemaining(path)
+        if critical:
+            return remaining is None or remaining > 0
+        if self.isPostingLow():
+            return False
+        return remaining is None or remaining > rateLimitReserve
+
+    def isPostingLow(self):
+        remaining = self.getRemaining(APIpostTweetPath)
+        return remaining is not None and remaining <= rateLimitReserve
+
+    # Seconds between polls of path that would use the rest of its budget evenly
+    # until the window resets, but never more often than minInterval
+    def getPollInterval(self, path, minInterval):
+        limit = self.getLimit(path)
+        if limit is None:
+            return minInterval
+        secondsLeft = limit[RateLimit_reset] - self.clock.timestamp()
+        spendable = limit[RateLimit_remaining] - rateLimitReserve
+        if spendable <= 0:
+            return max(minInterval, secondsLeft)
+        return max(minInterval, secondsLeft / spendable)
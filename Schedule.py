@@ -0,0 +1,83 @@
+# Schedule.py holds the compiled index of regularly-scheduled whistle times
+# so that lookups don't require scanning the schedule on every wake.
+
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from Constants import *
+
+class ScheduleIndex:
+    """Class that compiles the regular schedule into sorted
+    minute-of-week offsets for quick whistle lookups"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    weeklyOffsets = None # Sorted minute-of-week offsets for entire week
+    offsetSet     = None # Same offsets for membership checks
+
+    def __init__(self, regularSchedule):
+        self.weeklyOffsets = []
+
+        for weekday in range(dayPerWeek):
+            daySchedule = regularSchedule[weekday] if weekday < len(regularSchedule) else []
+            # Remove duplicates and sort so bisect works
+            dayOffsets = sorted({ time[config_hour] * minPerHour + time[config_minute]
+                                  for time in daySchedule })
+            self.weeklyOffsets.extend(weekday * minPerDay + offset for offset in dayOffsets)
+
+        self.offsetSet = set(self.weeklyOffsets)
+
+    @staticmethod
+    def minuteOfWeek(dt):
+        return dt.weekday() * minPerDay + dt.hour * minPerHour + dt.minute
+
+    # Converts minute offset from start of week containing "dt" into local datetime
+    @staticmethod
+    def offsetToDateTime(dt, offset):
+        weekStart = dt.replace(tzinfo=None, hour=minHour, minute=minMinute,
+                               second=minSecond, microsecond=0) \
+                    - timedelta(days=dt.weekday())
+        naive = weekStart + timedelta(minutes=offset)
+        # Localize rather than add to aware datetime so DST is respected
+        return tz.localize(naive) if dt.tzinfo is not None else naive
+
+    def isWhistleTime(self, dt):
+        return self.minuteOfWeek(dt) in self.offsetSet
+
+    # Returns datetime of next whistle strictly after the minute of "dt",
+    # looking into following days (and weeks) if needed
+    def getNextWhistleAfter(self, dt):
+        if len(self.weeklyOffsets) == 0:
+            return None
+
+        index = bisect_right(self.weeklyOffsets, self.minuteOfWeek(dt))
+        if index < len(self.weeklyOffsets):
+            return self.offsetToDateTime(dt, self.weeklyOffsets[index])
+        # Wrap around to first whistle of next week
+        return self.offsetToDateTime(dt, self.weeklyOffsets[0] + minPerWeek)
+
+    # Returns datetimes of all whistles in range [startDT, endDT)
+    def getWhistlesBetween(self, startDT, endDT):
+        whistles = []
+        if len(self.weeklyOffsets) == 0 or endDT <= startDT:
+            return whistles
+
+        startOffset = self.minuteOfWeek(startDT)
+        # Include whistle in starting minute only if starting at top of that minute
+        if startDT.second == minSecond and startDT.microsecond == 0:
+            index = bisect_left(self.weeklyOffsets, startOffset)
+        else:
+            index = bisect_right(self.weeklyOffsets, startOffset)
+
+        weekOffset = 0
+        while True:
+            if index >= len(self.weeklyOffsets):
+                index = 0
+                weekOffset += minPerWeek
+            whistleDT = self.offsetToDateTime(startDT, self.weeklyOffsets[index] + weekOffset)
+            if whistleDT >= endDT:
+                return whistles
+            whistles.append(whistleDT)
+            index += 1
@@ -0,0 +1,119 @@
+# Scheduler.py holds the event queue driving the main loop. All timed work
+# (whistles, GAMEDAY phases, DM polls, daily check) goes into one priority
+# queue so the loop always wakes for whichever deadline comes first.
+
+import heapq
+import itertools
+from time import perf_counter
+from Constants import *
+from Clock import Clock
+
+class EventScheduler:
+    """Class that holds timed events in a priority queue
+    and runs each one once its deadline arrives"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    queue   = None # Heap of [deadline, sequence, name, callback]
+    pending = None # Event name to its queue entry, for replacing/cancelling
+    counter = None # Breaks deadline ties in order events were scheduled
+    stopped = False
+    clock   = None
+
+    # Event being run by "run", for measuring how late work happens
+    currentEvent    = None
+    currentDeadline = None
+    currentStart    = None # perf_counter() when event started
+
+    # How far off the most recent wake was from its deadline (seconds)
+    lastWakeDrift   = 0.0
+    maxWakeDrift    = 0.0
+
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else Clock()
+        self.queue = []
+        self.pending = {}
+        self.counter = itertools.count()
+        self.stopped = False
+
+    # Events are named, so scheduling a name already pending replaces it
+    def schedule(self, name, deadline, callback):
+        self.cancel(name)
+        entry = [deadline, next(self.counter), name, callback]
+        self.pending[name] = entry
+        heapq.heappush(self.queue, entry)
+
+    # Cancelled entries stay in heap with no callback and are skipped when reached
+    def cancel(self, name):
+        entry = self.pending.pop(name, None)
+        if entry is not None:
+            entry[3] = None
+
+    def getNextDeadline(self):
+        # Discard cancelled events sitting at top of heap
+        while len(self.queue) > 0 and self.queue[0][3] is None:
+            heapq.heappop(self.queue)
+        if len(self.queue) == 0:
+            return None
+        return self.queue[0][0]
+
+    # Removes and returns (deadline, name, callback) of every event whose deadline has passed
+    def popDueEvents(self, now):
+        dueEvents = []
+        while True:
+            nextDeadline = self.getNextDeadline()
+            if nextDeadline is None or nextDeadline > now:
+                return dueEvents
+            deadline, sequence, name, callback = heapq.heappop(self.queue)
+            del self.pending[name]
+            dueEvents.append((deadline, name, callback))
+
+    # Runs every event whose deadline has passed, earliest first
+    def runDueEvents(self, now):
+        numRun = 0
+        for deadline, name, callback in self.popDueEvents(now):
+            if self.runEvent(deadline, name, callback):
+                numRun += 1
+        return numRun
+
+    # Returns whether event ran (skipped once stopped)
+    def runEvent(self, deadline, name, callback):
+        if self.stopped:
+            return False
+        self.currentEvent = name
+        self.currentDeadline = deadline
+        self.currentStart = perf_counter()
+        try:
+            callback()
+        finally:
+            self.currentEvent = None
+            self.currentDeadline = None
+        return True
+
+    def recordWakeDrift(self, drift):
+        self.lastWakeDrift = drift
+        self.maxWakeDrift = max(self.maxWakeDrift, abs(drift))
+        if abs(drift) > wakeTolerance:
+            logging.warning("Woke {0:+.0f} ms from deadline".format(drift * 1000))
+        else:
+            logging.debug("Woke {0:+.0f} ms from deadline".format(drift * 1000))
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        while not self.stopped:
+            nextDeadline = self.getNextDeadline()
+            if nextDeadline is None:
+                logging.warning("Event queue empty, leaving main loop")
+                return
+
+            now = self.clock.now()
+            if nextDeadline > now:
+                # Sleep until earliest deadline, then recheck in case of early wake
+                self.recordWakeDrift(self.clock.sleepUntil(nextDeadline))
+                continue
+
+            self.runDueEvents(now)
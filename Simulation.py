@@ -0,0 +1,110 @@
+# Simulation.py runs the bot on a simulated clock against the stand-in
+# servers, so months of schedule (WTWB and football games included) run in
+# seconds. Useful for regression and throughput testing of scheduling logic.
+
+# Run with: python3 Simulation.py [start YYYY-MM-DD] [end YYYY-MM-DD] [session file]
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from sys import argv
+from time import perf_counter
+
+from Constants import *
+from Clock import SimulatedClock
+from StandIn import StandInSession, StandInServer
+from GTWhistler import Whistler
+
+simSessionFile  = "ExampleData/exampleStandInSession.json"
+simScheduleFile = "ExampleData/exampleSchedule.json"
+simConfigFile   = "ExampleData/exampleConfig.json"
+simDMPollPeriod = 60 # minutes, since polling every minute of a year is slow even locally
+simConfigWatchPeriod = 60 # minutes, for the same reason
+Event_simulationEnd = "simulationEnd"
+
+# Bot reads and writes its files in working directory, so give it a scratch one
+def prepareWorkDir(workDir, scheduleFile, configFile):
+    if workDir is None:
+        workDir = tempfile.mkdtemp(prefix="GTW_sim_")
+    shutil.copyfile(configFile, os.path.join(workDir, APIConfigFile))
+    shutil.copyfile(scheduleFile, os.path.join(workDir, scheduleConfigFile))
+    return workDir
+
+# Returns (whistler, session, real seconds taken) after running from start to end
+def runSimulation(start, end,
+                  sessionFile=simSessionFile,
+                  scheduleFile=simScheduleFile,
+                  configFile=simConfigFile,
+                  workDir=None,
+                  DMPollPeriod=simDMPollPeriod,
+                  whistlerClass=Whistler):
+    sessionFile = os.path.abspath(sessionFile)
+    workDir = prepareWorkDir(workDir, os.path.abspath(scheduleFile), os.path.abspath(configFile))
+    prevDir = os.getcwd()
+    os.chdir(workDir)
+
+    clock = SimulatedClock(start)
+    session = StandInSession.load(sessionFile, clock.timestamp)
+    server = StandInServer(session).startBackground()
+
+    try:
+        realStart = perf_counter()
+        whistler = whistlerClass(clock, server.getAddress(), football=True)
+        whistler.DMPollPeriod = DMPollPeriod
+        whistler.configCheckPeriod = simConfigWatchPeriod
+        whistler.scheduler.schedule(Event_simulationEnd, end, whistler.scheduler.stop)
+        whistler.start()
+        realElapsed = perf_counter() - realStart
+    finally:
+        server.stop()
+        os.chdir(prevDir)
+
+    return whistler, session, realElapsed
+
+# Datetimes of tweets posted during the simulation
+def getPostedTimes(session):
+    return [datetime.fromtimestamp(tweet["timestamp"], tz)
+            for tweet in session.tweets[len(session.data.get("tweets", [])):]]
+
+# Regression check that a WTWB or GAMEDAY doesn't cost the following day its first
+# regular whistle. Special days are those with a tweet off the regular schedule.
+# Returns target datetimes of first whistles that weren't posted in time.
+def findMissedFirstWhistles(whistler, session, start, end):
+    posted = getPostedTimes(session)
+    specialDays = { dt.date() for dt in posted if not whistler.scheduleIndex.isWhistleTime(dt) }
+    missed = []
+    day = start.date()
+    while day < end.date():
+        if day - timedelta(days=1) in specialDays and day not in specialDays:
+            dayStart = tz.localize(datetime.combine(day, datetime.min.time()))
+            dayEnd = tz.localize(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+            whistles = whistler.scheduleIndex.getWhistlesBetween(dayStart, dayEnd)
+            if len(whistles) > 0:
+                first = whistles[0]
+                window = first + timedelta(minutes=outboxLatenessWindow)
+                if not any(first <= dt < window for dt in posted):
+                    missed.append(first)
+        day += timedelta(days=1)
+    return missed
+
+def printSummary(start, end, session, realElapsed):
+    print("Simulated {0} to {1} ({2} days) in {3:.1f} s".format(
+        start.strftime(dtFormat), end.strftime(dtFormat), (end - start).days, realElapsed))
+    print(" - Tweets posted:   " + str(len(getPostedTimes(session))))
+    print(" - DMs sent:        " + str(len(session.sentDMs)))
+    print(" - Requests served: " + str(len(session.log)))
+
+# -----------------
+# --- EXECUTION ---
+# -----------------
+
+if __name__ == "__main__":
+    start = tz.localize(datetime.strptime(argv[1] if len(argv) > 1 else "2016-08-22", "%Y-%m-%d"))
+    end   = tz.localize(datetime.strptime(argv[2] if len(argv) > 2 else "2017-05-10", "%Y-%m-%d"))
+    sessionFile = argv[3] if len(argv) > 3 else simSessionFile
+
+    whistler, session, realElapsed = runSimulation(start, end, sessionFile)
+    printSummary(start, end, session, realElapsed)
+    for first in findMissedFirstWhistles(whistler, session, start, end):
+        print(" - Missed first whistle after WTWB/GAMEDAY: " + first.strftime(dtFormat))
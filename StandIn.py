@@ -0,0 +1,422 @@
+# StandIn.py holds local stand-in servers for the Twitter and FantasyData
+# endpoints GTWhistler uses, so the bot can be load-tested and benchmarked
+# without the real services. A session file scripts (or replays a recording
+# of) what the services return over time, such as a full game's score
+# progression or a burst of DMs, along with injected latency and errors.
+
+# Run standalone with: python3 StandIn.py [session file] [port]
+# then set "standInServer" in Constants.py to "localhost:[port]".
+
+import gzip
+import http.client
+import http.server
+import json
+import threading
+import urllib.parse
+from datetime import datetime
+from sys import argv
+from time import sleep, time
+
+from Constants import *
+
+# Twitter paths are served under this prefix, as at api.twitter.com
+standInTwitterPrefix = "/1.1/"
+standInTwitterSuffix = ".json"
+
+# Twitter endpoints that are POSTed rather than fetched
+standInPostPaths = [APIpostTweetPath, APIpostDMPath]
+
+class StandInSession:
+    """Class that holds the scripted state the stand-in servers replay,
+    and records what the bot sent to them"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    # Session file fields. Every "at" is seconds after the session starts.
+    #   botUserID:  ID the bot posts as
+    #   tweets:     timeline before session starts, oldest first ("text", optional "at")
+    #   dms:        DMs received ("at", "sender_id", "text")
+    #   schedule:   FantasyData "Games/{year}" payloads, by year
+    #   boxScores:  by GameID, list of ("at", "Game") frames in time order,
+    #               where "at" counts from kickoff if the game is in "schedule"
+    #   latency:    seconds of delay, by path substring (or "*" for all)
+    #   faults:     list of ("path", "status", "count") errors to return
+    #   rateLimits: by Twitter resource, "limit" calls per "window" seconds
+    data      = None
+    clock     = None # Returns current epoch seconds (real or simulated)
+    startTime = None
+    lock      = None
+    nextID    = 1
+
+    tweets    = None # Posted tweets, oldest first
+    sentDMs   = None # DMs posted by the bot
+    log       = None # Every request served, for recording
+    rateWindows = None # Rate limit windows, resource -> [reset time, calls left]
+
+    def __init__(self, data, clock=time):
+        self.data = data
+        self.clock = clock
+        self.startTime = clock()
+        self.lock = threading.Lock()
+        self.sentDMs = []
+        self.log = []
+        self.faults = [dict(fault) for fault in data.get("faults", [])]
+        self.latency = dict(data.get("latency", {}))
+        self.rateWindows = {}
+
+        # Untimed tweets are spaced a minute apart, ending just before session starts
+        self.tweets = []
+        initialTweets = data.get("tweets", [])
+        for index, tweet in enumerate(initialTweets):
+            self.addTweet(tweet[APIfield_TweetText],
+                          self.startTime + tweet.get("at", (index - len(initialTweets)) * secPerMin))
+
+    @staticmethod
+    def load(fileName, clock=time):
+        with open(fileName, encoding='utf-8') as dataFile:
+            return StandInSession(json.loads(dataFile.read()), clock)
+
+    def getElapsed(self):
+        return self.clock() - self.startTime
+
+    def makeID(self):
+        self.nextID += 1
+        return self.nextID
+
+    # --- Injection ---
+
+    def injectFault(self, path, status, count=1):
+        with self.lock:
+            self.faults.append({ "path": path, "status": status, "count": count })
+
+    def setLatency(self, path, seconds):
+        with self.lock:
+            self.latency[path] = seconds
+
+    def getLatency(self, path):
+        for pathPart, seconds in self.latency.items():
+            if pathPart == "*" or pathPart in path:
+                return seconds
+        return 0
+
+    # Returns status of next injected error for this path, if any
+    def takeFault(self, path):
+        with self.lock:
+            for fault in self.faults:
+                if fault["path"] in path and fault["count"] > 0:
+                    fault["count"] -= 1
+                    return fault["status"]
+        return None
+
+    # Counts call against resource's window, like Twitter, returning
+    # (whether allowed, rate limit headers)
+    def takeRateLimit(self, resource):
+        rateLimit = self.data.get("rateLimits", {}).get(resource)
+        if rateLimit is None:
+            return True, {}
+        with self.lock:
+            now = self.clock()
+            window = self.rateWindows.get(resource)
+            if window is None or now >= window[0]:
+                window = [now + rateLimit["window"], rateLimit["limit"]]
+                self.rateWindows[resource] = window
+            allowed = window[1] > 0
+            if allowed:
+                window[1] -= 1
+            return allowed, {
+                RateLimit_limit:     str(rateLimit["limit"]),
+                RateLimit_remaining: str(window[1]),
+                RateLimit_reset:     str(int(window[0]))
+            }
+
+    # --- Twitter ---
+
+    def addTweet(self, text, timestamp):
+        self.tweets.append({
+            "id":                    self.makeID(),
+            APIfield_TweetText:      text,
+            APIfield_TweetTimestamp: datetime.fromtimestamp(timestamp, tz).strftime(dtFormatTwitter),
+            "timestamp":             timestamp
+        })
+
+    def postTweet(self, text):
+        with self.lock:
+            # Twitter refuses exact duplicates of recent tweets
+            for tweet in self.tweets[-numTweetsCompare:]:
+                if tweet[APIfield_TweetText] == text:
+                    return 403, { "errors": [{ "code": 187, "message": "Status is a duplicate." }] }
+            self.addTweet(text, self.clock())
+            return 200, self.publicTweet(self.tweets[-1])
+
+    @staticmethod
+    def publicTweet(tweet):
+        return { key: value for key, value in tweet.items() if key != "timestamp" }
+
+    def getTimeline(self, count):
+        with self.lock:
+            return 200, [self.publicTweet(tweet) for tweet in reversed(self.tweets[-count:])]
+
+    # Paged like Twitter: "cursor" is opaque to the caller, here an offset into newest-first list
+    def getReceivedDMs(self, count=DM_defaultPageSize, cursor=None):
+        now = self.getElapsed()
+        events = []
+        for index, DM in enumerate(self.data.get("dms", [])):
+            if DM["at"] > now:
+                continue
+            events.append({
+                DM_type:      DM_messageCreate,
+                "id":         str(index + 1),
+                DM_timestamp: str(int((self.startTime + DM["at"]) * 1000)),
+                DM_messageCreate: {
+                    DM_target:      { DM_recipientID: str(self.data.get("botUserID", 0)) },
+                    DM_senderID:    str(DM[DM_senderID]),
+                    DM_messageData: { DM_text: DM[DM_text] }
+                }
+            })
+        # Newest first, as Twitter returns them
+        events.reverse()
+        start = int(cursor) if cursor else 0
+        page = { DM_events: events[start:start + count] }
+        if start + count < len(events):
+            page[DM_nextCursor] = str(start + count)
+        return 200, page
+
+    def postDM(self, payload):
+        with self.lock:
+            self.sentDMs.append({
+                "timestamp": self.clock(),
+                DM_recipientID: payload[DM_event][DM_messageCreate][DM_target][DM_recipientID],
+                DM_text: payload[DM_event][DM_messageCreate][DM_messageData][DM_text]
+            })
+        return 200, { DM_event: payload[DM_event] }
+
+    # --- FantasyData ---
+
+    def getSchedule(self, year):
+        schedule = self.data.get("schedule", {})
+        if year not in schedule:
+            return 404, { "statusCode": 404, "message": "No schedule for " + year }
+        return 200, schedule[year]
+
+    def getBoxScore(self, gameID):
+        frames = self.data.get("boxScores", {}).get(gameID)
+        if frames is None:
+            return 404, { "statusCode": 404, "message": "No game " + gameID }
+
+        # Latest frame that has happened yet
+        now = self.clock() - self.getKickoff(gameID)
+        game = frames[0]["Game"]
+        for frame in frames:
+            if frame["at"] > now:
+                break
+            game = frame["Game"]
+        return 200, [{ APIfield_Game: game }]
+
+    # Epoch seconds of kickoff, or session start if game isn't scheduled
+    def getKickoff(self, gameID):
+        for games in self.data.get("schedule", {}).values():
+            for game in games:
+                if str(game[APIfield_GameID]) == gameID and game[APIfield_DateTime] is not None:
+                    kickoff = datetime.strptime(game[APIfield_DateTime], dtFormatFootballAPI)
+                    return tz.localize(kickoff).timestamp()
+        return self.startTime
+
+    # --- Recording ---
+
+    def record(self, method, path, status):
+        with self.lock:
+            self.log.append({ "at": self.getElapsed(), "method": method,
+                              "path": path, "status": status })
+
+    # Saves session with everything the bot posted, so it can be replayed or compared
+    def saveRecording(self, fileName):
+        recording = dict(self.data)
+        with self.lock:
+            recording["tweets"] = [{ APIfield_TweetText: tweet[APIfield_TweetText],
+                                     "at": tweet["timestamp"] - self.startTime }
+                                   for tweet in self.tweets]
+            recording["sentDMs"] = [{ DM_text: DM[DM_text],
+                                      "at": DM["timestamp"] - self.startTime }
+                                    for DM in self.sentDMs]
+            recording["requests"] = list(self.log)
+        with open(fileName, 'w') as outFile:
+            json.dump(recording, outFile, indent=4)
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Class that answers one request using the server's session"""
+
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real services
+    disable_nagle_algorithm = True # Otherwise small kept-alive responses stall on delayed ACKs
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def do_POST(self):
+        self.respond("POST")
+
+    def respond(self, method):
+        session = self.server.session
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        # Always consume body so the kept-alive connection stays in sync
+        self.body = self.readBody()
+
+        delay = session.getLatency(url.path)
+        if delay > 0:
+            sleep(delay)
+
+        rateHeaders = {}
+        status = session.takeFault(url.path)
+        if status is None and url.path.startswith(standInTwitterPrefix):
+            allowed, rateHeaders = session.takeRateLimit(
+                url.path[len(standInTwitterPrefix):-len(standInTwitterSuffix)])
+            if not allowed:
+                status = 429
+        if status is not None:
+            body = { "errors": [{ "message": "Injected fault" if status != 429 else "Rate limit exceeded" }],
+                     "statusCode": status }
+        else:
+            try:
+                status, body = self.route(session, method, url.path, query)
+            except Exception as e:
+                status, body = 500, { "errors": [{ "message": str(e) }] }
+
+        session.record(method, url.path, status)
+        self.sendJSON(status, body, rateHeaders)
+
+    def route(self, session, method, path, query):
+        if path.startswith(standInTwitterPrefix):
+            resource = path[len(standInTwitterPrefix):-len(standInTwitterSuffix)]
+            if method == "POST" and resource == APIpostTweetPath:
+                return session.postTweet(self.readForm()[Tweet_status])
+            if method == "POST" and resource == APIpostDMPath:
+                return session.postDM(json.loads(self.body))
+            if method == "GET" and resource == APIgetTweetsPath:
+                return session.getTimeline(int(query.get(Tweet_count, [numTweetsCompare])[0]))
+            if method == "GET" and resource == APIgetDMsPath:
+                return session.getReceivedDMs(int(query.get(DM_count, [DM_defaultPageSize])[0]),
+                                              query.get(DM_cursor, [None])[0])
+        elif path.startswith(APIscorespath + APIschedule):
+            return session.getSchedule(path[len(APIscorespath + APIschedule):])
+        elif path.startswith(APIstatspath + APIboxscore):
+            return session.getBoxScore(path[len(APIstatspath + APIboxscore):])
+
+        return 404, { "errors": [{ "message": "Not a stand-in endpoint: " + path }] }
+
+    def readBody(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length).decode() if length > 0 else ""
+
+    def readForm(self):
+        return { key: values[0] for key, values in urllib.parse.parse_qs(self.body).items() }
+
+    def sendJSON(self, status, body, extraHeaders={}):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in extraHeaders.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # Requests are recorded in the session instead
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    """Class that serves both the Twitter and FantasyData stand-ins
+    from one local port, in a background thread"""
+
+    daemon_threads = True
+
+    def __init__(self, session, host="localhost", port=0):
+        http.server.ThreadingHTTPServer.__init__(self, (host, port), StandInHandler)
+        self.session = session
+        self.thread = None
+
+    def getAddress(self):
+        return "{0}:{1}".format(self.server_address[0], self.server_address[1])
+
+    def startBackground(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class StandInResponse:
+    """Class with the parts of a TwitterAPI response GTWhistler reads"""
+
+    def __init__(self, status_code, text, headers):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+
+class StandInTwitterClient:
+    """Class that stands in for TwitterAPI, sending the same
+    requests over plain HTTP to a stand-in server"""
+
+    server = None
+    conn   = None
+    lock   = None
+
+    def __init__(self, server):
+        self.server = server
+        self.lock = threading.Lock()
+
+    def request(self, resource, params=None):
+        path = standInTwitterPrefix + resource + standInTwitterSuffix
+        body = None
+        requestHeaders = {}
+        if resource in standInPostPaths:
+            method = "POST"
+            # Like TwitterAPI, string params are sent as-is (JSON for DMs)
+            if isinstance(params, str):
+                body = params
+                requestHeaders["Content-Type"] = "application/json"
+            elif params is not None:
+                body = urllib.parse.urlencode(params)
+                requestHeaders["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            method = "GET"
+            if params:
+                path += "?" + urllib.parse.urlencode(params)
+
+        with self.lock:
+            for attempt in range(2):
+                if self.conn is None:
+                    self.conn = http.client.HTTPConnection(self.server, timeout=APItimeout)
+                try:
+                    self.conn.request(method, path, body, requestHeaders)
+                    response = self.conn.getresponse()
+                    text = response.read().decode()
+                    break
+                except (http.client.HTTPException, OSError):
+                    self.conn.close()
+                    self.conn = None
+                    if attempt > 0:
+                        raise
+
+        return StandInResponse(response.status, text, dict(response.getheaders()))
+
+# -----------------
+# --- EXECUTION ---
+# -----------------
+
+if __name__ == "__main__":
+    sessionFile = argv[1] if len(argv) > 1 else "ExampleData/exampleStandInSession.json"
+    port = int(argv[2]) if len(argv) > 2 else 8080
+
+    server = StandInServer(StandInSession.load(sessionFile), port=port)
+    print("Stand-in servers at " + server.getAddress())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,275 @@
+# StateStore.py holds state kept between instances of the bot running.
+# It's an SQLite database in WAL mode, so each small update is its own
+# atomic transaction and a crash mid-write can't corrupt earlier state.
+
+import json
+import os
+import sqlite3
+import threading
+
+from Constants import *
+
+class StateStore:
+    """Class that keeps typed tables of state in an SQLite database,
+    with a key/value table for anything without a table of its own"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    fileName   = None
+    connection = None
+    lock       = None # DMQueue's worker thread shares the connection
+
+    def __init__(self, fileName=stateFile):
+        self.fileName = os.path.abspath(fileName)
+        self.lock = threading.RLock()
+        isNew = not os.path.exists(self.fileName)
+
+        # Autocommit mode, so each statement outside "with" is its own transaction
+        self.connection = sqlite3.connect(self.fileName, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.createTables()
+
+        if isNew:
+            self.migrateStorageFile(os.path.join(os.path.dirname(self.fileName), storageFile))
+
+    def createTables(self):
+        with self.lock:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS keyValues (
+                    key   TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS dmCursor (
+                    id        INTEGER PRIMARY KEY CHECK (id = 0),
+                    timestamp INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS processedDMs (
+                    id        TEXT PRIMARY KEY,
+                    timestamp INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS tweetHistory (
+                    seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+                    text      TEXT NOT NULL,
+                    createdAt TEXT NOT NULL,
+                    timestamp REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS tweetOutbox (
+                    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+                    text        TEXT NOT NULL,
+                    targetTime  REAL NOT NULL,
+                    attempts    INTEGER NOT NULL DEFAULT 0,
+                    nextAttempt REAL NOT NULL,
+                    state       TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS gamedayCheckpoint (
+                    id        INTEGER PRIMARY KEY CHECK (id = 0),
+                    phase     TEXT NOT NULL,
+                    gameInfo  TEXT,
+                    gameState TEXT,
+                    lastPoll  REAL,
+                    savedAt   REAL NOT NULL
+                );
+            """)
+
+    # Carries values over from the old JSON storage file, once
+    def migrateStorageFile(self, oldFileName):
+        try:
+            with open(oldFileName, 'r') as inFile:
+                storage = json.load(inFile)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logging.error("Failure to read storage file for migration: " + str(e))
+            return
+
+        if Storage_LatestDMTimestamp in storage:
+            self.setDMCursor(storage.pop(Storage_LatestDMTimestamp))
+        if Storage_TweetHistory in storage:
+            self.replaceTweetHistory(storage.pop(Storage_TweetHistory))
+        self.setValues(storage)
+
+        os.replace(oldFileName, oldFileName + storageMigratedSuffix)
+        logging.info("Migrated " + oldFileName + " to " + self.fileName)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    # ------------------
+    # --- KEY/VALUES ---
+    # ------------------
+
+    def getValue(self, key, default=None):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM keyValues WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def setValues(self, values):
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO keyValues (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in values.items()])
+
+    # -----------------------
+    # --- DIRECT MESSAGES ---
+    # -----------------------
+
+    def getDMCursor(self):
+        with self.lock:
+            row = self.connection.execute("SELECT timestamp FROM dmCursor WHERE id = 0").fetchone()
+        return row[0] if row is not None else 0
+
+    def setDMCursor(self, timestamp):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO dmCursor (id, timestamp) VALUES (0, ?)", (int(timestamp),))
+
+    def isDMProcessed(self, DMID):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM processedDMs WHERE id = ?", (str(DMID),)).fetchone()
+        return row is not None
+
+    # Forgets IDs older than the API could return again, so table stays small
+    def addProcessedDM(self, DMID, timestamp):
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute(
+                "INSERT OR IGNORE INTO processedDMs (id, timestamp) VALUES (?, ?)",
+                (str(DMID), int(timestamp)))
+            self.connection.execute(
+                "DELETE FROM processedDMs WHERE timestamp < ?",
+                (int(timestamp) - processedDMRetention*secPerDay*msPerSec,))
+
+    # ---------------------
+    # --- TWEET HISTORY ---
+    # ---------------------
+
+    # Newest first, like the Twitter timeline
+    def getTweetHistory(self, maxTweets):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT text, createdAt, timestamp FROM tweetHistory ORDER BY seq DESC LIMIT ?",
+                (maxTweets,)).fetchall()
+        return [self.makeTweetEntry(row) for row in rows]
+
+    @staticmethod
+    def makeTweetEntry(row):
+        return {
+            APIfield_TweetText:      row[0],
+            APIfield_TweetTimestamp: row[1],
+            History_timestamp:       row[2]
+        }
+
+    # One row appended (and oldest trimmed), rather than whole history rewritten
+    def addTweet(self, entry, maxTweets):
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute(
+                "INSERT INTO tweetHistory (text, createdAt, timestamp) VALUES (?, ?, ?)",
+                (entry[APIfield_TweetText], entry[APIfield_TweetTimestamp], entry[History_timestamp]))
+            self.connection.execute(
+                "DELETE FROM tweetHistory WHERE seq <= (SELECT MAX(seq) FROM tweetHistory) - ?",
+                (maxTweets,))
+
+    # Entries given newest first
+    def replaceTweetHistory(self, entries):
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("DELETE FROM tweetHistory")
+            self.connection.executemany(
+                "INSERT INTO tweetHistory (text, createdAt, timestamp) VALUES (?, ?, ?)",
+                [(entry[APIfield_TweetText], entry[APIfield_TweetTimestamp], entry[History_timestamp])
+                 for entry in reversed(entries)])
+
+    # --------------------
+    # --- TWEET OUTBOX ---
+    # --------------------
+
+    # First attempt is at targetTime, unless held back until nextAttempt
+    def addOutboxTweet(self, text, targetTime, nextAttempt=None):
+        with self.lock:
+            cursor = self.connection.execute(
+                "INSERT INTO tweetOutbox (text, targetTime, attempts, nextAttempt, state) VALUES (?, ?, 0, ?, ?)",
+                (text, targetTime, nextAttempt if nextAttempt is not None else targetTime, Outbox_pending))
+        return cursor.lastrowid
+
+    # Oldest first
+    def getPendingOutbox(self):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT seq, text, targetTime, attempts, nextAttempt FROM tweetOutbox "
+                "WHERE state = ? ORDER BY seq", (Outbox_pending,)).fetchall()
+        return [{
+            Outbox_seq:         row[0],
+            Outbox_text:        row[1],
+            Outbox_targetTime:  row[2],
+            Outbox_attempts:    row[3],
+            Outbox_nextAttempt: row[4]
+        } for row in rows]
+
+    def updateOutboxAttempt(self, seq, attempts, nextAttempt):
+        with self.lock:
+            self.connection.execute(
+                "UPDATE tweetOutbox SET attempts = ?, nextAttempt = ? WHERE seq = ?",
+                (attempts, nextAttempt, seq))
+
+    # Finished entries are kept for a while for looking into problems
+    def finishOutboxTweet(self, seq, state):
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("UPDATE tweetOutbox SET state = ? WHERE seq = ?", (state, seq))
+            self.connection.execute(
+                "DELETE FROM tweetOutbox WHERE state != ? AND seq <= (SELECT MAX(seq) FROM tweetOutbox) - ?",
+                (Outbox_pending, outboxKeepFinished))
+
+    # --------------------------
+    # --- GAMEDAY CHECKPOINT ---
+    # --------------------------
+
+    # Returns dictionary of checkpoint fields, or None if there isn't one
+    def readGamedayCheckpoint(self):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT phase, gameInfo, gameState, lastPoll, savedAt FROM gamedayCheckpoint WHERE id = 0"
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            Checkpoint_phase:     row[0],
+            Checkpoint_gameInfo:  json.loads(row[1]) if row[1] is not None else None,
+            Checkpoint_gameState: json.loads(row[2]) if row[2] is not None else None,
+            Checkpoint_lastPoll:  row[3],
+            Checkpoint_savedAt:   row[4]
+        }
+
+    def storeGamedayCheckpoint(self, phase, gameInfo, gameState, lastPoll, savedAt):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO gamedayCheckpoint "
+                "(id, phase, gameInfo, gameState, lastPoll, savedAt) VALUES (0, ?, ?, ?, ?, ?)",
+                (phase,
+                 json.dumps(gameInfo) if gameInfo is not None else None,
+                 json.dumps(gameState) if gameState is not None else None,
+                 lastPoll, savedAt))
+
+    def clearGamedayCheckpoint(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM gamedayCheckpoint")
+
+# Store for current directory, opened on first use
+# (Reopened if directory changes, as simulations run in their own)
+stateStore = None
+
+def getStateStore():
+    global stateStore
+    if stateStore is None or stateStore.fileName != os.path.abspath(stateFile):
+        if stateStore is not None:
+            stateStore.close()
+        stateStore = StateStore(stateFile)
+    return stateStore
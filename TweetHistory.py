@@ -0,0 +1,82 @@
+# TweetHistory.py holds a local record of the bot's most recent tweets, so
+# whistling doesn't need to fetch the timeline from Twitter every time.
+
+from collections import deque
+from datetime import datetime
+
+from Constants import *
+import StateStore
+
+class TweetHistory:
+    """Class that keeps a persisted ring buffer of recently posted
+    tweets, reconciled with the Twitter timeline now and then"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    tweets = None # Newest first, shaped like Twitter API tweets plus a timestamp
+
+    def __init__(self, maxTweets=numTweetsCompare):
+        self.tweets = deque(maxlen=maxTweets)
+
+    @staticmethod
+    def makeEntry(text, dt):
+        return {
+            APIfield_TweetText:      text,
+            APIfield_TweetTimestamp: dt.strftime(dtFormatTwitter),
+            History_timestamp:       dt.timestamp()
+        }
+
+    def load(self):
+        self.tweets.clear()
+        try:
+            self.tweets.extend(StateStore.getStateStore().getTweetHistory(self.tweets.maxlen))
+        except Exception as e:
+            logging.error("Failure to read tweet history: " + str(e))
+
+    # Whole history is only rewritten on reconcile; tweets are added a row at a time
+    def store(self):
+        try:
+            StateStore.getStateStore().replaceTweetHistory(list(self.tweets))
+        except Exception as e:
+            logging.error("Failure to write tweet history: " + str(e))
+
+    def isEmpty(self):
+        return len(self.tweets) == 0
+
+    # Newest first, like the Twitter timeline
+    def getTweets(self):
+        return list(self.tweets)
+
+    def getLatestDateTime(self):
+        if self.isEmpty():
+            return None
+        return datetime.fromtimestamp(self.tweets[0][History_timestamp], tz)
+
+    def contains(self, text):
+        for tweet in self.tweets:
+            if tweet[APIfield_TweetText] == text:
+                return True
+        return False
+
+    def add(self, text, dt):
+        entry = self.makeEntry(text, dt)
+        self.tweets.appendleft(entry)
+        try:
+            StateStore.getStateStore().addTweet(entry, self.tweets.maxlen)
+        except Exception as e:
+            logging.error("Failure to write tweet history: " + str(e))
+
+    # Timeline from Twitter is the authority, so replace local record with it
+    def reconcile(self, timeline):
+        entries = []
+        for tweet in timeline[:self.tweets.maxlen]:
+            tweetTime = datetime.strptime(tweet[APIfield_TweetTimestamp], dtFormatTwitter)
+            entries.append(self.makeEntry(tweet[APIfield_TweetText], tweetTime.astimezone(tz)))
+
+        if entries != list(self.tweets):
+            logging.info("Reconciled tweet history with timeline")
+        self.tweets.clear()
+        self.tweets.extend(entries)
+        self.store()
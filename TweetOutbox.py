@@ -0,0 +1,62 @@
+# TweetOutbox.py holds whistles waiting to be posted. Each is journaled
+# with its target time before posting, so a failed post can be retried
+# and a crash can't lose (or, after a restart, repeat) a whistle.
+
+from datetime import datetime
+
+from Constants import *
+import StateStore
+
+class TweetOutbox:
+    """Class that journals tweets before they are posted, tracking
+    retries with backoff until posted or too late to bother"""
+
+    # "notBeforeDT" holds first attempt back, such as to space it from the last tweet
+    @staticmethod
+    def add(text, targetDT, notBeforeDT=None):
+        StateStore.getStateStore().addOutboxTweet(
+            text, targetDT.timestamp(), notBeforeDT.timestamp() if notBeforeDT is not None else None)
+
+    # Oldest first
+    @staticmethod
+    def getPending():
+        return StateStore.getStateStore().getPendingOutbox()
+
+    def hasPending(self):
+        return len(self.getPending()) > 0
+
+    @staticmethod
+    def getTargetDateTime(entry):
+        return datetime.fromtimestamp(entry[Outbox_targetTime], tz)
+
+    @staticmethod
+    def isTooLate(entry, now):
+        return now.timestamp() - entry[Outbox_targetTime] > outboxLatenessWindow * secPerMin
+
+    @staticmethod
+    def isDue(entry, now):
+        return entry[Outbox_nextAttempt] <= now.timestamp()
+
+    # Stored before posting, so after a crash mid-post it's known the tweet may be up
+    @staticmethod
+    def startAttempt(entry, now):
+        entry[Outbox_attempts] += 1
+        entry[Outbox_nextAttempt] = now.timestamp() + \
+            min(outboxMaxDelay, outboxBaseDelay * 2 ** (entry[Outbox_attempts] - 1))
+        StateStore.getStateStore().updateOutboxAttempt(
+            entry[Outbox_seq], entry[Outbox_attempts], entry[Outbox_nextAttempt])
+
+    @staticmethod
+    def markPosted(entry):
+        StateStore.getStateStore().finishOutboxTweet(entry[Outbox_seq], Outbox_posted)
+
+    @staticmethod
+    def markAbandoned(entry):
+        StateStore.getStateStore().finishOutboxTweet(entry[Outbox_seq], Outbox_abandoned)
+
+    # Earliest time a pending tweet should be tried again, or None if none pending
+    def getNextAttemptDateTime(self):
+        pending = self.getPending()
+        if len(pending) == 0:
+            return None
+        return datetime.fromtimestamp(min(entry[Outbox_nextAttempt] for entry in pending), tz)
@@ -2,15 +2,18 @@
 # to a particular class or file and must be accessible all around.
 
 from Constants import *
-import json
+import LogStore
+import StateStore
 from datetime import datetime
 
 def logFileSetup():
     try:
-        logging.basicConfig(
-            filename=logFile,
-            level=logLevel,
-            format='%(asctime)s: %(message)s')
+        rootLogger = logging.getLogger()
+        rootLogger.setLevel(logLevel)
+        # Setup runs again each day, so only install handler once
+        if not any(isinstance(handler, LogStore.IndexedRotatingHandler)
+                   for handler in rootLogger.handlers):
+            rootLogger.addHandler(LogStore.IndexedRotatingHandler(logFile, logStructured))
     except Exception as e:
         errorStr = "Error when setting up log file: " + str(e)
         return errorStr
@@ -21,25 +24,30 @@ def getLog(numLines=DM_defaultNumLines):
     if numLines > DM_maxNumLines:
         numLines = DM_maxNumLines
     try:
-        with open(logFile, 'r') as inFile:
-            logText = inFile.readlines()
-            # If log file is too short, only return what it has
-            if len(logText) < numLines:
-                numLines = len(logText)
-
-            # Limit length of any particular line to 100 characters
-            # to ensure it can be DMed
-            for line in logText:
-                if len(line) > DM_maxLineLength:
-                    logText[logText.index(line)] = line[:DM_maxLineLength - 6] + "[...]\n"
-
-            # Read latest lines by reverse indexing,
-            # then form into single string
-            # (Each log line has new line character already.)
-            return ''.join(logText[-numLines:])
+        # Only the end of the log is read, so this stays quick however big the log gets
+        logText = LogStore.tailLines(numLines, logFile)
     except Exception as e:
         logging.error("Failure to read from log file: " + str(e))
         return ""
+    return formatLogLines(logText)
+
+# Log lines from startDT (until endDT, if given), truncated for DMing
+def getLogRange(startDT, endDT=None, numLines=DM_maxNumLines):
+    try:
+        # Index finds where range starts, so only bytes in range are read
+        logText = LogStore.readRange(startDT, endDT, min(numLines, DM_maxNumLines), logFile)
+    except Exception as e:
+        logging.error("Failure to read range from log file: " + str(e))
+        return ""
+    return formatLogLines(logText)
+
+# Limit length of any particular line to ensure it can be DMed,
+# then form into single string
+# (Each log line has new line character already.)
+def formatLogLines(logText):
+    return ''.join(line if len(line) <= DM_maxLineLength
+                   else line[:DM_maxLineLength - 6] + "[...]\n"
+                   for line in logText)
 
 def convertTimestampToDateTime(timestampStr):
     # Find if timestamp has timezone substring and
@@ -54,20 +62,67 @@ def convertTimestampToDateTime(timestampStr):
     
     return datetime.strptime(timestampStr, "%a %b %d %H:%M:%S %Y")
 
-def storeLatestDMTimestamp(timestamp):
-    timestamp = { Storage_LatestDMTimestamp: timestamp }
+# State lives in an SQLite database, where each write is a small atomic transaction
+def readStorageValue(key, default=None):
+    try:
+        return StateStore.getStateStore().getValue(key, default)
+    except Exception as e:
+        logging.error("Failure to read from state store: " + str(e))
+        return default
+
+def storeStorageValues(values):
+    try:
+        StateStore.getStateStore().setValues(values)
+    except Exception as e:
+        logging.error("Failure to write state store: " + str(e))
 
+def storeLatestDMTimestamp(timestamp):
     try:
-        with open(storageFile, 'w') as outFile:
-            json.dump(timestamp, outFile, indent=4)
+        StateStore.getStateStore().setDMCursor(timestamp)
     except Exception as e:
-        logging.error("Failure to write storage file: " + str(e))
-        return
+        logging.error("Failure to write DM cursor: " + str(e))
 
 def readLatestDMTimestamp():
     try:
-        with open(storageFile, 'r') as inFile:
-            return json.load(inFile)[Storage_LatestDMTimestamp]
+        return StateStore.getStateStore().getDMCursor()
     except Exception as e:
-        logging.error("Failure to read from storage file: " + str(e))
+        logging.error("Failure to read DM cursor: " + str(e))
         return 0
+
+def isDMProcessed(DMID):
+    try:
+        return StateStore.getStateStore().isDMProcessed(DMID)
+    except Exception as e:
+        logging.error("Failure to read processed DMs: " + str(e))
+        return False
+
+def storeProcessedDM(DMID, timestamp):
+    try:
+        StateStore.getStateStore().addProcessedDM(DMID, timestamp)
+    except Exception as e:
+        logging.error("Failure to write processed DM: " + str(e))
+
+# GAMEDAY progress, so a restart mid-game resumes instead of starting over
+def storeGamedayCheckpoint(phase, gameInfo, gameState, lastPoll, savedAt):
+    try:
+        StateStore.getStateStore().storeGamedayCheckpoint(
+            phase.name, gameInfo, gameState,
+            lastPoll.timestamp() if lastPoll is not None else None,
+            savedAt.timestamp())
+    except Exception as e:
+        logging.error("Failure to write GAMEDAY checkpoint: " + str(e))
+
+# Phase and times are returned as a GamedayPhase and datetimes
+def readGamedayCheckpoint():
+    try:
+        checkpoint = StateStore.getStateStore().readGamedayCheckpoint()
+        if checkpoint is None:
+            return None
+        checkpoint[Checkpoint_phase] = GamedayPhase[checkpoint[Checkpoint_phase]]
+        if checkpoint[Checkpoint_lastPoll] is not None:
+            checkpoint[Checkpoint_lastPoll] = datetime.fromtimestamp(checkpoint[Checkpoint_lastPoll], tz)
+        checkpoint[Checkpoint_savedAt] = datetime.fromtimestamp(checkpoint[Checkpoint_savedAt], tz)
+        return checkpoint
+    except Exception as e:
+        logging.error("Failure to read GAMEDAY checkpoint: " + str(e))
+        return None
@@ -0,0 +1,111 @@
+# WhistleText.py holds the generator for random whistle text. Every
+# combination of letter counts is numbered, and texts are drawn by walking a
+# persisted shuffle of those numbers, so no text repeats until all have
+# been used and each draw costs the same no matter how many came before.
+
+from random import random, shuffle
+
+from Constants import *
+import Utils
+
+# Letter, default count and allowed variation, in the order they're written
+whistleLetters = [
+    ("s", SsDefault,     SsDelta),
+    ("h", HsDefault,     HsDelta),
+    ("e", LowEsDefault,  LowEsDelta),
+    ("E", HighEsDefault, HighEsDelta),
+    ("O", HighOsDefault, HighOsDelta),
+    ("o", LowOsDefault,  LowOsDelta)
+]
+
+# Stand up for what you believe in
+# (Suffix and its chance of being added, the remainder being no suffix)
+whistleSuffixes = [
+    ("",                      0.80),
+    (" (#BlackLivesMatter)",  0.05),
+    (" (#StopAsianHate)",     0.05),
+    (" (#GetVaccinated)",     0.10)
+]
+
+def buildWhistleText(counts, suffix=""):
+    s, h, e, E, O, o = counts
+    return "s" * s + "h" * h + "vr" + "e" * e + "E" * E + "O" * O + "o" * o + "w" + suffix
+
+class WhistleTextGenerator:
+    """Class that numbers every whistle text combination and draws them
+    without replacement by walking a persisted shuffled order"""
+
+    # ---------------
+    # --- Members ---
+    # ---------------
+
+    numTexts = 0    # Combinations of letter counts
+    numIndices = 0  # Combinations of letter counts and suffixes
+
+    # Shuffled letter count combinations for this cycle, stored once per cycle,
+    # and how far through it draws are (stored on every draw)
+    order  = None
+    cursor = 0
+
+    def __init__(self):
+        self.numTexts = 1
+        for letter, default, delta in whistleLetters:
+            self.numTexts *= 2 * delta + 1
+        self.numIndices = self.numTexts * len(whistleSuffixes)
+
+    # Index is letter count combination then suffix, in mixed radix
+    def indexToText(self, index):
+        index, suffixIndex = divmod(index, len(whistleSuffixes))
+        counts = []
+        for letter, default, delta in reversed(whistleLetters):
+            index, digit = divmod(index, 2 * delta + 1)
+            counts.append(default - delta + digit)
+        counts.reverse()
+        return buildWhistleText(counts, whistleSuffixes[suffixIndex][0])
+
+    def newCycle(self):
+        self.order = list(range(self.numTexts))
+        shuffle(self.order)
+        self.cursor = 0
+        Utils.storeStorageValues({
+            Storage_WhistleTextOrder: self.order,
+            Storage_WhistleTextState: self.getState()
+        })
+
+    def load(self):
+        state = Utils.readStorageValue(Storage_WhistleTextState)
+        order = Utils.readStorageValue(Storage_WhistleTextOrder)
+        if state is None or order is None or \
+           state[TextState_size] != self.numTexts or len(order) != self.numTexts:
+            # No order yet, or letter counts changed so old one no longer fits
+            self.newCycle()
+            return
+        self.order = order
+        self.cursor = state[TextState_cursor]
+
+    def getState(self):
+        return {
+            TextState_size:   self.numTexts,
+            TextState_cursor: self.cursor
+        }
+
+    def store(self):
+        Utils.storeStorageValues({ Storage_WhistleTextState: self.getState() })
+
+    # Suffix keeps its original odds; uniqueness comes from letter counts alone
+    @staticmethod
+    def chooseSuffixIndex():
+        cause = random()
+        for suffixIndex, (suffix, chance) in enumerate(whistleSuffixes):
+            if cause < chance:
+                return suffixIndex
+            cause -= chance
+        return 0
+
+    def nextText(self):
+        if self.order is None or self.cursor >= self.numTexts:
+            self.newCycle()
+        textIndex = self.order[self.cursor]
+        self.cursor += 1
+        self.store()
+        return self.indexToText(textIndex * len(whistleSuffixes) + self.chooseSuffixIndex())